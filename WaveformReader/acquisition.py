@@ -0,0 +1,131 @@
+import numpy as np
+
+# Acquisition modes: how successive triggered frames combine into one display trace
+ACQUISITION_MODES = ('normal', 'average', 'exponential', 'envelope', 'hires')
+MAX_AVERAGE_COUNT = 1024
+MAX_RING_BYTES = 256 * 1024 * 1024  # average-mode ring; deep records get fewer frames
+HIRES_MAX_WINDOW = 16     # boxcar samples in hi-res mode; each 4x adds one bit
+
+
+def boxcarMean(y, width, out=None):
+    """Centred moving average of width samples, edges padded with the end values.
+
+    Uses a cumulative sum, so the cost does not depend on width.
+    """
+    n = len(y)
+    if width <= 1 or n == 0:
+        if out is None:
+            return np.array(y, dtype=np.float64)
+        out[:] = y
+        return out
+    left = (width - 1) // 2
+    padded = np.pad(y, (left + 1, width - 1 - left), mode='edge')
+    padded[0] = 0.0
+    c = np.cumsum(padded)
+    out = np.subtract(c[width:width + n], c[:n], out=out)
+    out /= width
+    return out
+
+
+class FrameAverager:
+    """Combines successive triggered frames of one channel into a display trace.
+
+    average:      mean of the last N frames. A ring of N frames and a running
+                  sum are updated in place, one subtract and one add per
+                  frame, so the cost does not grow with N.
+    exponential:  avg += (y - avg) / N, with 1 / count while fewer than N
+                  frames have arrived so the first frame does not dominate.
+    envelope:     running min / max of every frame since the last reset.
+    hires:        not combined across frames; boxcarMean() is applied to the
+                  frame before triggering instead.
+
+    add() returns a new array (the GUI keeps it while the next frame is
+    combined), plus the lower bound in envelope mode. configure() with a
+    different mode, count or frame length starts over, as does reset().
+    """
+
+    def __init__(self):
+        self.mode = 'normal'
+        self.size = 0
+        self.length = 0
+        self.count = 0
+        self._ring = None
+        self._sum = None
+        self._index = 0
+        self._since_resync = 0
+        self._low = None
+        self._high = None
+        self._scratch = None
+
+    def configure(self, mode, size, length):
+        """Set the mode, frame count N and frame length; reallocates only when needed.
+
+        In average mode N is capped so the ring fits in MAX_RING_BYTES.
+        """
+        if mode not in ACQUISITION_MODES:
+            raise ValueError(f"Unknown acquisition mode: {mode}")
+        size = max(1, min(int(size), MAX_AVERAGE_COUNT))
+        if mode == 'average':
+            size = max(1, min(size, MAX_RING_BYTES // (8 * max(length, 1))))
+        if (mode, size, length) == (self.mode, self.size, self.length):
+            return
+        self.mode, self.size, self.length = mode, size, length
+        self._ring = np.empty((size, length)) if mode == 'average' else None
+        self._sum = np.empty(length) if mode in ('average', 'exponential') else None
+        self._scratch = np.empty(length) if mode == 'exponential' else None
+        self._low = np.empty(length) if mode == 'envelope' else None
+        self._high = np.empty(length) if mode == 'envelope' else None
+        self.reset()
+
+    def reset(self):
+        self.count = 0
+        self._index = 0
+        self._since_resync = 0
+
+    def add(self, y):
+        """Combine one triggered frame. Returns (trace, lower) where lower is None except in envelope mode."""
+        mode = self.mode
+        if mode in ('normal', 'hires') or len(y) != self.length:
+            return y, None
+
+        if mode == 'average':
+            ring, total = self._ring, self._sum
+            slot = ring[self._index]
+            if self.count < self.size:
+                if self.count == 0:
+                    total[:] = 0.0
+                self.count += 1
+            else:
+                total -= slot
+            slot[:] = y
+            total += slot
+            self._index = (self._index + 1) % self.size
+            # Subtracting and re-adding accumulates rounding error; rebuild the
+            # sum once per pass over the ring, amortized O(frame length)
+            self._since_resync += 1
+            if self._since_resync >= self.size and self.count == self.size:
+                self._since_resync = 0
+                ring.sum(axis=0, out=total)
+            return total / self.count, None
+
+        if mode == 'exponential':
+            avg = self._sum
+            self.count = min(self.count + 1, self.size)
+            if self.count == 1:
+                avg[:] = y
+            else:
+                delta = np.subtract(y, avg, out=self._scratch)
+                delta *= 1.0 / self.count
+                avg += delta
+            return avg.copy(), None
+
+        # envelope
+        low, high = self._low, self._high
+        if self.count == 0:
+            low[:] = y
+            high[:] = y
+        else:
+            np.minimum(low, y, out=low)
+            np.maximum(high, y, out=high)
+        self.count += 1
+        return high.copy(), low.copy()
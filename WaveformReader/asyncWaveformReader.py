@@ -0,0 +1,277 @@
+import asyncio
+import enum
+import struct
+import threading
+import time
+
+from tcpWaveformReader import (
+    DECODE_TABLE, MAX_FRAME_SIZE, TCP_IP, TCP_PORT, WIFI_SSID, WIFI_PASSWORD, decodeCodes,
+)
+from frameDelivery import DELIVERY_LATEST, makeDelivery
+from wifi import joinAccessPoint
+
+BATTERY_MSG_LEN = 2
+
+
+class ProbeState(enum.Enum):
+    IDLE = "idle"              # not asked to connect
+    CONNECTING = "connecting"  # TCP connect in progress
+    STREAMING = "streaming"    # connected, reading messages
+    BACKOFF = "backoff"        # waiting before the next connect attempt
+    CLOSED = "closed"          # shut down for good
+
+
+class AsyncProbeConnection:
+    """One probe's length-prefixed TCP stream, driven by an asyncio event loop.
+
+    Messages are a 2-byte big-endian length followed by either a frame
+    (frame_size big-endian uint16 samples) or a 2-byte battery status.
+    Iterate with `async for codes, timestamp in conn:` to get each frame's
+    12-bit raw ADC codes; the connection
+    reconnects on its own while enabled.
+    """
+
+    def __init__(self, frame_size, host=TCP_IP, port=TCP_PORT, connect_timeout=5,
+                 read_timeout=4, retry_interval=1, max_retries=None):
+        if not 0 < frame_size <= MAX_FRAME_SIZE:
+            raise ValueError(f"TCP frames hold 1..{MAX_FRAME_SIZE} samples, got {frame_size}")
+        self.frame_size = frame_size
+        self.host = host
+        self.port = port
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.retry_interval = retry_interval
+        self.max_retries = max_retries
+        self.state = ProbeState.IDLE
+        self.battery_info = None
+        self.retries = 0
+        self._closed = False
+        self._enabled = None
+        self._writer = None
+
+    # ── Control (call on the event loop) ─────────────────────────────────
+
+    def enable(self):
+        self.retries = 0
+        self._enabledEvent().set()
+
+    def disable(self):
+        self._enabledEvent().clear()
+        self._closeWriter()
+
+    def close(self):
+        self._closed = True
+        self._closeWriter()
+        self._enabledEvent().set()  # wake the state machine so it can exit
+
+    def send(self, pkt):
+        """Queue bytes for the probe. Dropped when not streaming."""
+        if self.state is ProbeState.STREAMING and self._writer is not None:
+            self._writer.write(pkt)
+
+    def _enabledEvent(self):
+        # Created lazily so it binds to the loop that runs the connection
+        if self._enabled is None:
+            self._enabled = asyncio.Event()
+        return self._enabled
+
+    def _closeWriter(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+    # ── Reconnect state machine ──────────────────────────────────────────
+
+    def __aiter__(self):
+        return self._frames()
+
+    async def _frames(self):
+        enabled = self._enabledEvent()
+        while not self._closed:
+            if not enabled.is_set():
+                self.state = ProbeState.IDLE
+                await enabled.wait()
+                continue
+
+            self.state = ProbeState.CONNECTING
+            try:
+                reader, self._writer = await asyncio.wait_for(
+                    asyncio.open_connection(self.host, self.port), self.connect_timeout
+                )
+            except (OSError, asyncio.TimeoutError):
+                self.retries += 1
+                if self.max_retries is not None and self.retries >= self.max_retries:
+                    print("TCP failed — WiFi may be down")
+                    enabled.clear()
+                else:
+                    self.state = ProbeState.BACKOFF
+                    await asyncio.sleep(self.retry_interval)
+                continue
+
+            print("TCP Connected")
+            self.retries = 0
+            self.state = ProbeState.STREAMING
+            try:
+                while enabled.is_set():
+                    frame = await self._readMessage(reader)
+                    if frame is not None:
+                        yield frame
+            except (OSError, asyncio.IncompleteReadError, asyncio.TimeoutError):
+                if enabled.is_set():
+                    print("TCP Lost, Reconnecting...")
+            finally:
+                self._closeWriter()
+
+            if enabled.is_set() and not self._closed:
+                self.state = ProbeState.BACKOFF
+                await asyncio.sleep(self.retry_interval)
+        self.state = ProbeState.CLOSED
+
+    async def _readMessage(self, reader):
+        """Read one message. Returns (samples, timestamp) for frames, None otherwise."""
+        header = await asyncio.wait_for(reader.readexactly(2), self.read_timeout)
+        msg_len = struct.unpack('>H', header)[0]
+        payload = await asyncio.wait_for(reader.readexactly(msg_len), self.read_timeout)
+
+        if msg_len == self.frame_size * 2:
+            return decodeCodes(payload), time.monotonic()
+        if msg_len == BATTERY_MSG_LEN:
+            self.battery_info = {
+                'charging': payload[0] == 1,
+                'percentage': payload[1],
+            }
+            return None
+        print(f"Unknown message length: {msg_len}, skipping")
+        return None
+
+
+# ── Shared event loop ─────────────────────────────────────────────────────
+
+_loop = None
+_loop_lock = threading.Lock()
+
+
+def sharedProbeLoop():
+    """Return the process-wide event loop that serves every AsyncWaveformReader."""
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="probe-loop", daemon=True).start()
+        return _loop
+
+
+class AsyncWaveformReader:
+    """Drop-in replacement for TCPWaveformReader backed by AsyncProbeConnection.
+
+    All readers share one event loop thread, so N probes cost one thread
+    rather than N blocking reader threads.
+    """
+
+    MAX_TCP_RETRIES = 2
+    DECODE_TABLE = DECODE_TABLE
+
+    def __init__(self, frame_size, max_queue=10, retry_interval=1, delivery=DELIVERY_LATEST,
+                 host=TCP_IP, port=TCP_PORT, loop=None):
+        self.frame_size = frame_size
+        self.frames = makeDelivery(delivery, maxsize=max_queue)
+        self.connection = AsyncProbeConnection(
+            frame_size, host=host, port=port, retry_interval=retry_interval,
+            max_retries=self.MAX_TCP_RETRIES,
+        )
+        self._timestamps = {}  # id() of each delivered, unreleased frame -> receive time
+        self._wifi_connecting = False
+        self._wifi_result = None  # (success: bool, message: str) or None
+        self._wifi_ssid = WIFI_SSID
+        self._wifi_password = WIFI_PASSWORD
+        self._loop = loop or sharedProbeLoop()
+        self._task = asyncio.run_coroutine_threadsafe(self._pump(), self._loop)
+
+    async def _pump(self):
+        async for frame in self.connection:
+            # Queued together so a frame never picks up a newer frame's timestamp
+            self.frames.put(frame)
+
+    # ── TCPWaveformReader API ────────────────────────────────────────────
+
+    def connect(self):
+        """Start (or resume) streaming without touching WiFi."""
+        self._loop.call_soon_threadsafe(self.connection.enable)
+
+    def connectWifi(self, ssid=None, password=None):
+        """Join the probe's access point in a background thread, then start streaming."""
+        if self._wifi_connecting:
+            return
+        if ssid is not None:
+            self._wifi_ssid = ssid
+        if password is not None:
+            self._wifi_password = password
+        self._wifi_connecting = True
+        self._wifi_result = None
+        threading.Thread(target=self._wifiConnectThread, daemon=True).start()
+
+    def _wifiConnectThread(self):
+        try:
+            success, message = joinAccessPoint(self._wifi_ssid, self._wifi_password)
+            if success:
+                self.connect()
+            self._wifi_result = (success, message)
+        finally:
+            self._wifi_connecting = False
+
+    def userDisconnect(self):
+        """Disconnect and stop auto-reconnect until connectWifi is called again."""
+        if self.connected:
+            print("Disconnected by user")
+        self._loop.call_soon_threadsafe(self.connection.disable)
+
+    def getWifiResult(self):
+        """Poll for WiFi connection result. Returns (success, message) or None if still in progress."""
+        result = self._wifi_result
+        if result is not None:
+            self._wifi_result = None
+        return result
+
+    @property
+    def wifiConnecting(self):
+        return self._wifi_connecting
+
+    @property
+    def connected(self):
+        return self.connection.state is ProbeState.STREAMING
+
+    @property
+    def autoConnecting(self):
+        """True when streaming is enabled and TCP is still trying to connect."""
+        return self.connection.state in (ProbeState.CONNECTING, ProbeState.BACKOFF)
+
+    @property
+    def battery_info(self):
+        return self.connection.battery_info
+
+    def getLatestSamples(self):
+        """Return the next frame under the delivery policy, or None if none available."""
+        frame = self.frames.get()
+        if frame is None:
+            return None
+        samples, timestamp = frame
+        self._timestamps[id(samples)] = timestamp
+        return samples
+
+    def releaseSamples(self, samples):
+        """Frames are freshly allocated per message; only their timestamp is dropped."""
+        self._timestamps.pop(id(samples), None)
+
+    def frameTimestamp(self, samples):
+        """Host receive time (time.monotonic) of a frame returned by getLatestSamples()."""
+        return self._timestamps.get(id(samples))
+
+    def sendPacket(self, pkt):
+        self._loop.call_soon_threadsafe(self.connection.send, pkt)
+
+    def close(self):
+        self._loop.call_soon_threadsafe(self.connection.close)
+        try:
+            self._task.result(timeout=1)
+        except Exception:
+            self._task.cancel()
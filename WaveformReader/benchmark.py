@@ -0,0 +1,530 @@
+"""Benchmarks for the acquisition-to-display pipeline. No display is needed.
+
+    python benchmark.py                              # per-stage suite, printed
+    python benchmark.py --output base.json           # save results
+    python benchmark.py --baseline base.json         # compare, exit 1 on regression
+    python benchmark.py --system                     # end-to-end reader / GUI benchmarks
+"""
+import argparse
+import json
+import os
+import platform
+import socket
+import struct
+import sys
+import threading
+import time
+import tracemalloc
+
+import numpy as np
+
+from acquisition import FrameAverager
+from calibration import ProbeCalibration
+from decimation import MinMaxDecimator
+from emulator import ProbeEmulator, encodeVolts
+from filters import SlidingMedian
+from frameDelivery import DELIVERY_FIFO, DELIVERY_LATEST
+from history import FrameHistory
+from measurement import MeasurementManager
+from persistence import PersistenceBuffer, PersistenceGrid
+from spectrum import SpectrumAnalyzer, SpectrumSettings, WINDOWS
+from tcpWaveformReader import DECODE_TABLE, TCPWaveformReader, convert, convertFrame, decodeCodes
+from trigger import BAND_MODES, PULSE_MODES, TriggerSpec, applyTrigger, findTrigger, findTriggers
+
+FRAME_SIZE = 2000
+STAGE_SIZES = (2_000, 20_000, 200_000)
+DISPLAY_WIDTH = 1000       # plot pixels the decimate stage reduces a record to
+DEFAULT_THRESHOLD = 0.10   # fractional slowdown in ns/sample that counts as a regression
+REPEATS = 5
+# Receive-path allocation bounds: nothing kept per frame, and a transient peak
+# of fixed bookkeeping plus under half a raw frame, i.e. no copy of the payload
+MAX_RETAINED_PER_FRAME = 16   # bytes
+MAX_PEAK_OVERHEAD = 8192      # bytes, independent of frame size
+
+
+def _makeRawFrame(frame_size, seed=0):
+    rng = np.random.default_rng(seed)
+    return rng.integers(0, 0x10000, frame_size, dtype=np.uint16).astype('>u2').tobytes()
+
+
+def _makeSignalFrame(frame_size, cycles_per_2k=5.3, amplitude=0.05, noise=0.002, seed=0):
+    """Wire bytes of a noisy sine, at the same cycles per sample for every frame size."""
+    rng = np.random.default_rng(seed)
+    t = np.arange(frame_size) * (cycles_per_2k / 2000)
+    volts = amplitude * np.sin(2 * np.pi * t) + rng.normal(0, noise, frame_size)
+    return encodeVolts(volts).tobytes()
+
+
+def _timeIt(fn, min_time=0.5):
+    """Call fn repeatedly for at least min_time seconds, return seconds per call."""
+    fn()
+    calls = 0
+    start = time.perf_counter()
+    while True:
+        fn()
+        calls += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            return elapsed / calls
+
+
+def _bestOf(fn, min_time, repeats=REPEATS):
+    """Fastest of several _timeIt runs; the minimum is the least noisy estimate."""
+    return min(_timeIt(fn, min_time / repeats) for _ in range(repeats))
+
+
+# ── Per-stage suite ─────────────────────────────────────────────────────
+
+def _defaultCalibration():
+    from scopeGUI import scopeGUI
+    return ProbeCalibration(scopeGUI.OFFSET_CAL_POS, scopeGUI.OFFSET_CAL_NEG, scopeGUI.VGA_CAL)
+
+
+def pipelineStages(frame_size):
+    """(name, fn) for each processing stage, in pipeline order, as scopeGUI runs them.
+
+    Each stage is fed the previous stage's output for the same synthetic frame,
+    so the trigger finds real crossings and the measurements see a real signal.
+    """
+    display_size = frame_size // 2
+    gain, offset_steps = 5, 10
+    raw = _makeSignalFrame(frame_size)
+    cal = _defaultCalibration()
+    mm = MeasurementManager()
+
+    codes = decodeCodes(raw)
+    history = FrameHistory(64, frame_size)
+    calibrated = cal.applyCodes(codes, DECODE_TABLE, gain, offset_steps)
+    median = SlidingMedian(4)
+    filtered = median(calibrated)
+    median_out = np.empty_like(calibrated)
+    spectrum = SpectrumAnalyzer()
+    spectrum.configure(SpectrumSettings('hann', 'average', 16, 1e6), frame_size)
+    triggered = applyTrigger(filtered, display_size, 'rising')
+    averager = FrameAverager()
+    averager.configure('average', 64, display_size)
+    decimator = MinMaxDecimator()
+    x = np.linspace(0, 1e-3, display_size)
+
+    def measure():
+        mm.updateData(x, triggered)
+        return mm.getMeasurements()
+
+    return [
+        ("decode", lambda: decodeCodes(raw)),
+        ("history", lambda: history.append(codes, 0.0, gain, offset_steps, DECODE_TABLE)),
+        ("calibrate", lambda: cal.applyCodes(codes, DECODE_TABLE, gain, offset_steps)),
+        ("median_filter", lambda: median(calibrated, out=median_out)),
+        ("spectrum", lambda: spectrum.add(filtered)),
+        ("trigger", lambda: applyTrigger(filtered, display_size, 'rising')),
+        ("average", lambda: averager.add(triggered)),
+        ("decimate", lambda: decimator.decimate(triggered, DISPLAY_WIDTH)),
+        ("measurements", measure),
+    ]
+
+
+def checkCalibrationLUT(frame_size=FRAME_SIZE):
+    """Fused lookup must be bit-identical to decode + offset subtraction + VGA inversion."""
+    cal = _defaultCalibration()
+    raw = _makeRawFrame(frame_size)
+    codes = decodeCodes(raw)
+    volts = convertFrame(raw)
+    for gain in cal.vga:
+        for offset_steps in range(-85, 86):
+            fused = cal.applyCodes(codes, DECODE_TABLE, gain, offset_steps)
+            if not np.array_equal(fused, cal.apply(volts, gain, offset_steps)):
+                raise AssertionError(
+                    f"Calibration LUT differs from the three-step path at gain={gain}, "
+                    f"offset_steps={offset_steps}"
+                )
+
+
+def runStages(sizes=STAGE_SIZES, only=None, min_time=0.5):
+    """Time every stage at every frame size. Returns {stage: {size: result}}."""
+    results = {}
+    for n in sizes:
+        for name, fn in pipelineStages(n):
+            if only and name not in only:
+                continue
+            t = _bestOf(fn, min_time)
+            results.setdefault(name, {})[str(n)] = {
+                "ns_per_sample": t * 1e9 / n,
+                "frames_per_s": 1.0 / t,
+            }
+    return results
+
+
+def printStages(results, baseline=None):
+    print(f"{'stage':<15}{'samples':>9}{'ns/sample':>12}{'frames/s':>12}{'vs base':>10}")
+    for name, by_size in results.items():
+        for n, r in by_size.items():
+            line = f"{name:<15}{n:>9}{r['ns_per_sample']:12.3f}{r['frames_per_s']:12.0f}"
+            base = (baseline or {}).get(name, {}).get(n)
+            if base:
+                line += f"{r['ns_per_sample'] / base['ns_per_sample'] - 1:+10.1%}"
+            print(line)
+
+
+def findRegressions(results, baseline, threshold=DEFAULT_THRESHOLD):
+    """(stage, size, change) for every result slower than baseline by more than threshold."""
+    regressions = []
+    for name, by_size in results.items():
+        for n, r in by_size.items():
+            base = baseline.get(name, {}).get(n)
+            if not base:
+                continue
+            change = r['ns_per_sample'] / base['ns_per_sample'] - 1
+            if change > threshold:
+                regressions.append((name, n, change))
+    return regressions
+
+
+def _environment():
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "created": time.time(),
+    }
+
+
+# ── End-to-end benchmarks (--system) ────────────────────────────────────
+
+def benchDecode(frame_size=FRAME_SIZE):
+    raw = _makeRawFrame(frame_size)
+
+    def scalar():
+        return [convert(v) for v in struct.unpack('>' + 'H' * frame_size, raw)]
+
+    def vectorized():
+        return convertFrame(raw)
+
+    if not np.array_equal(np.array(scalar()), vectorized()):
+        raise AssertionError("convertFrame does not match convert()")
+
+    print(f"Decode ({frame_size} samples/frame)")
+    results = {}
+    for name, fn in (("convert", scalar), ("convertFrame", vectorized)):
+        t = _timeIt(fn)
+        results[name] = t
+        print(f"  {name:<14}{t * 1e6:10.1f} µs/frame {1.0 / t:12.0f} frames/s")
+    print(f"  speedup       {results['convert'] / results['convertFrame']:10.1f}x")
+    return results
+
+
+def benchMedian(sizes=(2_000, 200_000), windows=(2, 3, 4, 5, 9, 16, 32)):
+    """SlidingMedian against scipy.ndimage.median_filter, checking identical output."""
+    from scipy.ndimage import median_filter
+
+    rng = np.random.default_rng(0)
+    print("Median filter (scipy.ndimage vs SlidingMedian, µs/frame)")
+    results = {}
+    for n in sizes:
+        y = rng.normal(0, 1, n)
+        out = np.empty_like(y)
+        for size in windows:
+            median = SlidingMedian(size)
+            if not np.array_equal(median(y), median_filter(y, size=size)):
+                raise AssertionError(f"SlidingMedian({size}) does not match scipy at {n} samples")
+            t_scipy = _bestOf(lambda: median_filter(y, size=size), 0.5)
+            t_ours = _bestOf(lambda: median(y, out=out), 0.5)
+            results[(n, size)] = (t_scipy, t_ours)
+            print(f"  {n:>7} samples  size {size:<3}{t_scipy * 1e6:10.1f}{t_ours * 1e6:10.1f}"
+                  f"   {t_scipy / t_ours:5.1f}x")
+    return results
+
+
+def benchTrigger(sizes=(2_000, 200_000), batch=64, hysteresis=0.005):
+    """Trigger searches (edge with hysteresis, pulse, runt, window) against plain np.where."""
+    print(f"Trigger search (µs/frame, hysteresis {hysteresis * 1e3:g} mV, batch of {batch})")
+    results = {}
+    for n in sizes:
+        volts = convertFrame(_makeSignalFrame(n, seed=1))
+        frames = np.stack([convertFrame(_makeSignalFrame(n, seed=s)) for s in range(batch)])
+        level = 0.01
+        edge = TriggerSpec('rising', level, hysteresis)
+
+        def signChange():
+            shifted = volts - level
+            crossings = np.where((shifted[:-1] < 0) & (shifted[1:] >= 0))[0]
+            return crossings[0] if len(crossings) else None
+
+        cases = (
+            ("np.where", signChange),
+            ("findTrigger", lambda: findTrigger(volts, 'rising', level, hysteresis)),
+            ("applyTrigger", lambda: applyTrigger(volts, n // 2, edge)),
+            ("findTriggers", lambda: findTriggers(frames, 'rising', level, hysteresis)),
+        ) + tuple(
+            (mode, lambda spec=TriggerSpec(mode, level, 0.0, 0.03, 5, 100): applyTrigger(volts, n // 2, spec))
+            for mode in PULSE_MODES + BAND_MODES
+        )
+        for name, fn in cases:
+            t = _bestOf(fn, 0.5)
+            if name == "findTriggers":
+                t /= batch
+            results[(n, name)] = t
+            print(f"  {n:>7} samples  {name:<14}{t * 1e6:10.1f}")
+    return results
+
+
+def benchPersistence(grids=((1000, 600), (2000, 1200)), display_size=1000, frames=500):
+    """Persistence accumulation per frame and density redraw cost, against the frame budget."""
+    rng = np.random.default_rng(0)
+    t = np.arange(display_size) * (5.3 / display_size)
+    traces = [0.05 * np.sin(2 * np.pi * (t + rng.random())) + rng.normal(0, 0.002, display_size)
+              for _ in range(8)]
+    print("Persistence (µs/frame accumulate, ms/redraw with decay)")
+    results = {}
+    for width, height in grids:
+        buffer = PersistenceBuffer()
+        buffer.configure(PersistenceGrid(width, height, -0.1, 0.1, 1.0))
+        t0 = time.perf_counter()
+        for i in range(frames):
+            buffer.accumulate(traces[i % len(traces)])
+        t_acc = (time.perf_counter() - t0) / frames
+        out = np.empty((width, height), np.float32)
+
+        def redraw():
+            buffer.decay(0.9)
+            buffer.density(out=out)
+
+        t_draw = _bestOf(redraw, 0.2)
+        results[(width, height)] = (t_acc, t_draw)
+        print(f"  {width:>5}x{height:<5}{t_acc * 1e6:10.1f}{t_draw * 1e3:10.2f}"
+              f"   max {1 / t_acc:8.0f} frames/s")
+    return results
+
+
+def benchSpectrum(n=2048, target=1000):
+    """Spectra per second at n points for every window and mode, against a target rate."""
+    rng = np.random.default_rng(0)
+    y = np.sin(np.arange(n) * 0.37) + rng.normal(0, 0.01, n)
+    print(f"Spectrum ({n} points, spectra/s, target {target})")
+    results = {}
+    for name in WINDOWS:
+        for mode in ('normal', 'average', 'maxhold'):
+            analyzer = SpectrumAnalyzer()
+            analyzer.configure(SpectrumSettings(name, mode, 64, 1e6), n)
+            rate = 1.0 / _bestOf(lambda: analyzer.add(y), 0.2)
+            results[(name, mode)] = rate
+            flag = "" if rate >= target else "   BELOW TARGET"
+            print(f"  {name:<16}{mode:<9}{rate:10.0f}{flag}")
+    return results
+
+
+def benchReceiveAllocations(frame_size=FRAME_SIZE, num_frames=2000):
+    """Measure Python heap allocations of the pooled receive path with tracemalloc.
+
+    Raises AssertionError if the path retains memory per frame or its peak
+    grows by a frame copy, so an allocation regression fails.
+    """
+    reader = TCPWaveformReader(frame_size)
+    reader.close()  # drive _readFrame() from here instead of the reader thread
+    ours, theirs = socket.socketpair()
+    reader.sock, reader._connected = ours, True
+
+    payload = _makeRawFrame(frame_size)
+
+    def feed():
+        for _ in range(num_frames + 10):
+            theirs.sendall(payload)
+
+    feeder = threading.Thread(target=feed, daemon=True)
+    feeder.start()
+
+    def consumeOne():
+        reader._readFrame()
+        frame = reader.getLatestSamples()
+        reader.releaseSamples(frame)
+
+    for _ in range(10):
+        consumeOne()
+
+    tracemalloc.start()
+    start, _ = tracemalloc.get_traced_memory()
+    t0 = time.perf_counter()
+    for _ in range(num_frames):
+        consumeOne()
+    elapsed = time.perf_counter() - t0
+    end, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    feeder.join()
+    ours.close()
+    theirs.close()
+
+    print(f"Receive path ({frame_size} samples/frame, {num_frames} frames)")
+    print(f"  retained      {(end - start) / num_frames:10.1f} B/frame")
+    print(f"  peak transient{peak - start:10d} B")
+    print(f"  throughput    {num_frames / elapsed:10.0f} frames/s")
+    retained_per_frame = (end - start) / num_frames
+    assert retained_per_frame <= MAX_RETAINED_PER_FRAME, (
+        f"receive path retains {retained_per_frame:.1f} B/frame"
+    )
+    assert peak - start < MAX_PEAK_OVERHEAD + frame_size, (
+        f"receive path peak {peak - start} B suggests a copy of the {frame_size * 2} B frame"
+    )
+    return {"retained": end - start, "peak": peak - start}
+
+
+def benchMultiProbe(counts=(1, 2, 4), duration=2.0, fps=200):
+    """Run scopeGUI offscreen against N stand-in probes and measure the draw rate."""
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PyQt5.QtWidgets import QApplication
+    from scopeGUI import scopeGUI
+
+    app = QApplication.instance() or QApplication([])
+    print(f"Multi-probe GUI ({FRAME_SIZE} samples/frame, {fps} frames/s per probe)")
+    results = {}
+    for n in counts:
+        servers = [ProbeEmulator(port=0, fps=fps).start() for _ in range(n)]
+        readers = [
+            TCPWaveformReader(FRAME_SIZE, delivery=DELIVERY_LATEST, host='127.0.0.1', port=srv.port)
+            for srv in servers
+        ]
+        readers[0].connect()
+        window = scopeGUI(
+            FRAME_SIZE, reader=readers[0],
+            probes=[(f"Probe{i}", '127.0.0.1', srv.port) for i, srv in enumerate(servers[1:], 2)],
+        )
+        window._sync_timer.stop()  # no settings sync, so no post-connect settling blackout
+        deadline = time.monotonic() + 5
+        while not all(ch.reader.connected for ch in window.channels) and time.monotonic() < deadline:
+            time.sleep(0.05)
+
+        # Event-driven: frameReady draws coalesced to the display refresh, as in the application
+        ticks = [0]
+        window.timer.timeout.connect(lambda: ticks.__setitem__(0, ticks[0] + 1))
+        start = time.perf_counter()
+        while time.perf_counter() - start < duration:
+            app.processEvents()
+        tick_rate = ticks[0] / (time.perf_counter() - start)
+        window.processor.frameReady.disconnect(window._onFrameReady)
+        window.timer.stop()
+
+        # Unthrottled: how many updates per second the GUI thread could sustain
+        updates = 0
+        drawn = [0] * n
+        last = [None] * n
+        start = time.perf_counter()
+        while time.perf_counter() - start < duration:
+            window.updatePlot()
+            app.processEvents()
+            updates += 1
+            for i, ch in enumerate(window.channels):
+                if ch.timestamp != last[i]:
+                    last[i] = ch.timestamp
+                    drawn[i] += 1
+        elapsed = time.perf_counter() - start
+
+        for ch in window.channels:
+            ch.reader.close()
+        for srv in servers:
+            srv.close()
+        window.close()
+
+        capacity = updates / elapsed
+        results[n] = {"tick_rate": tick_rate, "capacity": capacity}
+        per_probe = ", ".join(f"{d / elapsed:.0f}" for d in drawn)
+        print(f"  {n} probe(s)  GUI {tick_rate:6.1f} draws/s   capacity {capacity:6.0f} updates/s"
+              f"   frames/s per probe: {per_probe}")
+    base = results[counts[0]]["tick_rate"]
+    for n in counts[1:]:
+        print(f"  {n} probes vs 1: {results[n]['tick_rate'] / base:.2f}x GUI draw rate")
+    return results
+
+
+def benchReaderStress(fps=500, duration=3.0, fragment=1400):
+    """Stream from the emulator well above device rate, with fragmentation and jitter."""
+    emu = ProbeEmulator(port=0, fps=fps, jitter=0.1 / fps, fragment=fragment).start()
+    reader = TCPWaveformReader(FRAME_SIZE, max_queue=1000, delivery=DELIVERY_FIFO,
+                               host='127.0.0.1', port=emu.port)
+    reader.connect()
+    deadline = time.monotonic() + 5
+    while not reader.connected and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    received = 0
+    start = time.perf_counter()
+    sent_start = emu.frames_sent
+    while time.perf_counter() - start < duration:
+        frame = reader.getLatestSamples()
+        if frame is None:
+            time.sleep(0.001)
+            continue
+        received += 1
+        reader.releaseSamples(frame)
+    elapsed = time.perf_counter() - start
+    sent = emu.frames_sent - sent_start
+    reader.close()
+    emu.close()
+
+    print(f"Reader stress ({fps} frames/s target, fragments <= {fragment} B)")
+    print(f"  sent          {sent / elapsed:10.0f} frames/s")
+    print(f"  received      {received / elapsed:10.0f} frames/s")
+    print(f"  dropped       {reader.frames.dropped:10d}")
+    return {"sent": sent / elapsed, "received": received / elapsed}
+
+
+def runSystem():
+    benchDecode()
+    benchMedian()
+    benchTrigger()
+    benchPersistence()
+    benchSpectrum()
+    benchReceiveAllocations()
+    benchReaderStress()
+    benchMultiProbe()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PocketProbe pipeline benchmarks")
+    parser.add_argument("--sizes", default=",".join(map(str, STAGE_SIZES)),
+                        help="comma-separated frame sizes, samples")
+    parser.add_argument("--stages", default="",
+                        help="comma-separated subset of stages to run (default: all)")
+    parser.add_argument("--min-time", type=float, default=0.5,
+                        help="seconds spent timing each stage at each size")
+    parser.add_argument("--output", help="write results to this JSON file")
+    parser.add_argument("--baseline", help="compare against results saved with --output")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="fractional ns/sample slowdown that fails the comparison")
+    parser.add_argument("--system", action="store_true",
+                        help="run the end-to-end reader and GUI benchmarks instead")
+    args = parser.parse_args()
+
+    if args.system:
+        os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+        runSystem()
+        return 0
+
+    sizes = [int(s) for s in args.sizes.split(",") if s]
+    only = {s for s in args.stages.split(",") if s}
+    checkCalibrationLUT()
+    results = runStages(sizes, only, args.min_time)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["stages"]
+    printStages(results, baseline)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"environment": _environment(), "stages": results}, f, indent=2)
+        print(f"Results written to {args.output}")
+
+    if baseline is not None:
+        regressions = findRegressions(results, baseline, args.threshold)
+        for name, n, change in regressions:
+            print(f"REGRESSION {name} @ {n} samples: {change:+.1%} ns/sample "
+                  f"(threshold {args.threshold:.0%})")
+        if regressions:
+            return 1
+        print(f"No regressions beyond {args.threshold:.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,84 @@
+import collections
+import threading
+
+import numpy as np
+
+LUT_CACHE_SIZE = 64  # (gain, offset_steps) tables kept; 4096 float64 entries = 32 KB each
+
+
+class ProbeCalibration:
+    """Analog front-end calibration for one probe.
+
+    offset_pos / offset_neg: (slope, intercept) of the offset DAC contribution
+    in volts per DAC step, for positive and negative steps.
+    vga: {gain: (m, c)} linear transfer function of each VGA gain setting.
+
+    Every stage from raw ADC code to input volts depends only on the 12-bit
+    code and (gain, offset_steps), so applyCodes() folds them into one
+    4096-entry table per setting, cached LRU, and calibrates a frame with a
+    single np.take. Change constants through setConstants() so the cached
+    tables are dropped.
+    """
+
+    def __init__(self, offset_pos, offset_neg, vga):
+        self._tables = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self.setConstants(offset_pos, offset_neg, vga)
+
+    def setConstants(self, offset_pos, offset_neg, vga):
+        """Replace the calibration constants and invalidate every cached lookup table."""
+        with self._lock:
+            self._offset_pos = tuple(offset_pos)
+            self._offset_neg = tuple(offset_neg)
+            self._vga = dict(vga)
+            self._tables.clear()
+
+    @property
+    def offset_pos(self):
+        return self._offset_pos
+
+    @property
+    def offset_neg(self):
+        return self._offset_neg
+
+    @property
+    def vga(self):
+        return self._vga
+
+    def offsetVolts(self, offset_steps):
+        if offset_steps > 0:
+            return self.offset_pos[0] * offset_steps + self.offset_pos[1]
+        if offset_steps < 0:
+            return self.offset_neg[0] * offset_steps + self.offset_neg[1]
+        return 0.0
+
+    def apply(self, y, gain, offset_steps):
+        """Map normalized ADC volts to input volts for a gain / committed offset setting."""
+        # Step 1: Subtract offset DAC contribution
+        y = y - self.offsetVolts(offset_steps)
+        # Step 2: Invert per-VGA transfer function
+        m, c = self.vga[gain]
+        return (y - c) / m
+
+    def lookupTable(self, decode_table, gain, offset_steps):
+        """Input volts for every raw code: apply() run once over the reader's decode table.
+
+        Element-wise, so entries are bit-identical to applying the three-step
+        path to each decoded sample.
+        """
+        # Decode tables are module constants, so their id() is stable for the process
+        key = (id(decode_table), gain, offset_steps)
+        with self._lock:
+            table = self._tables.get(key)
+            if table is not None:
+                self._tables.move_to_end(key)
+                return table
+            table = self.apply(decode_table, gain, offset_steps)
+            self._tables[key] = table
+            if len(self._tables) > LUT_CACHE_SIZE:
+                self._tables.popitem(last=False)
+            return table
+
+    def applyCodes(self, codes, decode_table, gain, offset_steps, out=None):
+        """Map a frame of 12-bit raw codes straight to input volts with one table lookup."""
+        return np.take(self.lookupTable(decode_table, gain, offset_steps), codes, out=out)
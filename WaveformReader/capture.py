@@ -0,0 +1,288 @@
+import json
+import os
+import queue
+import struct
+import threading
+import time
+
+import numpy as np
+
+CAPTURE_MAGIC = b'PPCAP\x00'
+CAPTURE_VERSION = 1
+HEADER_ALIGN = 4096
+BATCH_FRAMES = 64      # frames per background write
+BATCH_BYTES = 4 << 20  # caps the batch for deep frames
+NUM_BATCHES = 4        # batches in flight before new frames are dropped
+WRITE_BUFFER = 4 << 20
+
+
+def recordDtype(frame_size, sample_dtype='>u2'):
+    """Structured dtype of one capture record: receive time, settings and the raw frame."""
+    return np.dtype([
+        ('timestamp', '<f8'),      # host receive time, time.monotonic()
+        ('gain', 'u1'),            # VGA gain multiplier
+        ('vert_idx', 'u1'),        # volts/div knob index
+        ('horz_idx', 'u1'),        # timebase knob index
+        ('reserved', 'u1'),
+        ('offset_steps', '<i2'),   # committed vertical offset, DAC steps
+        ('h_offset', '<i2'),       # horizontal offset slider, thousandths of the display
+        ('samples', sample_dtype, (frame_size,)),
+    ])
+
+
+class CaptureWriter:
+    """Appends raw frames to a capture file from a background thread.
+
+    append() only copies the frame into a preallocated batch and returns, so
+    it is safe to call from a reader's acquisition thread. Full batches are
+    written by the writer thread in one large write. If the disk falls behind
+    and every batch is in flight, frames are dropped and counted instead of
+    blocking the caller.
+
+    File layout: CAPTURE_MAGIC, uint16 version, uint32 header length, JSON
+    metadata padded to HEADER_ALIGN, then fixed-size records (recordDtype).
+    """
+
+    def __init__(self, path, frame_size, metadata=None, sample_dtype='>u2'):
+        self.path = path
+        self.frame_size = frame_size
+        self.dtype = recordDtype(frame_size, sample_dtype)
+        self._sample_dtype = np.dtype(sample_dtype)
+        # (gain, vert_idx, horz_idx, offset_steps, h_offset); replaced wholesale by the GUI
+        self.settings = (1, 0, 0, 0, 0)
+        self.frames_written = 0
+        self.dropped = 0
+
+        meta = dict(metadata or {})
+        meta.update(frame_size=frame_size, sample_dtype=sample_dtype,
+                    record_size=self.dtype.itemsize, created=time.time())
+        blob = json.dumps(meta).encode()
+        prefix = len(CAPTURE_MAGIC) + 6
+        header_len = -(-(prefix + len(blob)) // HEADER_ALIGN) * HEADER_ALIGN
+        header = CAPTURE_MAGIC + struct.pack('<HI', CAPTURE_VERSION, header_len) + blob
+        self._file = open(path, 'wb', buffering=WRITE_BUFFER)
+        self._file.write(header.ljust(header_len, b'\0'))
+
+        self._batch_frames = max(1, min(BATCH_FRAMES, BATCH_BYTES // self.dtype.itemsize))
+        self._free = queue.Queue()
+        for _ in range(NUM_BATCHES):
+            self._free.put(np.zeros(self._batch_frames, dtype=self.dtype))
+        self._full = queue.Queue()
+        self._batch = self._free.get()
+        self._count = 0
+        self._lock = threading.Lock()
+        self._closed = False
+        self._thread = threading.Thread(target=self._writerThread, daemon=True)
+        self._thread.start()
+
+    def append(self, raw_bytes, timestamp):
+        """Copy one raw frame (wire-format bytes) into the current batch. Never blocks."""
+        with self._lock:
+            if self._closed:
+                return
+            if self._batch is None:
+                try:
+                    self._batch = self._free.get_nowait()
+                except queue.Empty:
+                    self.dropped += 1
+                    return
+            gain, vert_idx, horz_idx, offset_steps, h_offset = self.settings
+            rec = self._batch[self._count]
+            rec['timestamp'] = timestamp
+            rec['gain'] = gain
+            rec['vert_idx'] = vert_idx
+            rec['horz_idx'] = horz_idx
+            rec['offset_steps'] = offset_steps
+            rec['h_offset'] = h_offset
+            rec['samples'] = np.frombuffer(raw_bytes, dtype=self._sample_dtype)
+            self._count += 1
+            if self._count == self._batch_frames:
+                self._full.put((self._batch, self._count))
+                self._batch = None
+                self._count = 0
+
+    def _writerThread(self):
+        while True:
+            item = self._full.get()
+            if item is None:
+                break
+            batch, count = item
+            self._file.write(batch[:count].tobytes())
+            self.frames_written += count
+            self._free.put(batch)
+        self._file.close()
+
+    def close(self):
+        """Flush the partial batch and finish writing. Safe to call more than once."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            if self._batch is not None and self._count:
+                self._full.put((self._batch, self._count))
+            self._full.put(None)
+        self._thread.join()
+
+
+class CaptureFile:
+    """Random-access view of a capture file through np.memmap; opening is O(1)."""
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            prefix = f.read(len(CAPTURE_MAGIC) + 6)
+            if prefix[:len(CAPTURE_MAGIC)] != CAPTURE_MAGIC:
+                raise ValueError(f"{path} is not a PocketProbe capture")
+            version, header_len = struct.unpack_from('<HI', prefix, len(CAPTURE_MAGIC))
+            if version != CAPTURE_VERSION:
+                raise ValueError(f"Unsupported capture version {version}")
+            blob = f.read(header_len - len(prefix))
+        self.path = path
+        self.metadata = json.loads(blob.rstrip(b'\0'))
+        self.frame_size = self.metadata['frame_size']
+        self.dtype = recordDtype(self.frame_size, self.metadata['sample_dtype'])
+        # Ignore a trailing partial record left by an interrupted recording
+        count = (os.path.getsize(path) - header_len) // self.dtype.itemsize
+        if count > 0:
+            self.records = np.memmap(path, dtype=self.dtype, mode='r',
+                                     offset=header_len, shape=(count,))
+        else:
+            self.records = np.zeros(0, dtype=self.dtype)
+        self._table = self._decodeTable()
+
+    def _decodeTable(self):
+        if self.metadata.get('source') == 'serial':
+            from serialReader import DECODE_TABLE, GPIO_MASK
+        else:
+            from tcpWaveformReader import DECODE_TABLE, GPIO_MASK
+        self._mask = GPIO_MASK
+        return DECODE_TABLE
+
+    def __len__(self):
+        return len(self.records)
+
+    @property
+    def timestamps(self):
+        return self.records['timestamp']
+
+    def rawFrame(self, index):
+        """Raw wire-format samples of one frame (a memmap view, nothing is read eagerly)."""
+        return self.records[index]['samples']
+
+    def codes(self, index, out=None):
+        """12-bit raw ADC codes of one frame, like the live reader delivers."""
+        return np.bitwise_and(self.rawFrame(index), self._mask, out=out)
+
+    def frame(self, index, out=None):
+        """Decode one frame to normalized ADC volts."""
+        return np.take(self._table, self.codes(index), out=out)
+
+    def settings(self, index):
+        rec = self.records[index]
+        return {
+            'gain': int(rec['gain']),
+            'vert_idx': int(rec['vert_idx']),
+            'horz_idx': int(rec['horz_idx']),
+            'offset_steps': int(rec['offset_steps']),
+            'h_offset': int(rec['h_offset']),
+        }
+
+    def close(self):
+        # Dropping the last reference unmaps the file
+        self.records = np.zeros(0, dtype=self.dtype)
+
+
+class ReplayReader:
+    """Serves a capture through the live reader API so scopeGUI can replay it.
+
+    Frames are paced by their recorded timestamps (scaled by speed) and the
+    capture loops at the end.
+    """
+
+    SEARCH_WINDOW = 256
+
+    def __init__(self, path, speed=1.0, loop=True):
+        self.capture = CaptureFile(path)
+        self.frame_size = self.capture.frame_size
+        self.speed = speed
+        self.loop = loop
+        self.position = 0
+        self.battery_info = None
+        self.DECODE_TABLE = self.capture._table
+        self._out = np.zeros(self.frame_size, dtype=np.uint16)
+        self._index = 0
+        self._start_wall = None
+        self._start_ts = None
+
+    def seek(self, index):
+        self.position = max(0, min(len(self.capture) - 1, index))
+        self._start_wall = None
+
+    def getLatestSamples(self):
+        """Return the newest frame due at the current replay time, or None if none is due."""
+        n = len(self.capture)
+        if n == 0:
+            return None
+        if self.position >= n:
+            if not self.loop:
+                return None
+            self.position = 0
+            self._start_wall = None
+
+        ts = self.capture.timestamps
+        now = time.monotonic()
+        if self._start_wall is None:
+            self._start_wall = now
+            self._start_ts = ts[self.position]
+        due_ts = self._start_ts + (now - self._start_wall) * self.speed
+
+        # Skip to the newest due frame, like the live mailbox. Only a bounded window of
+        # timestamps is searched so a multi-GB capture is never scanned end to end.
+        window = ts[self.position:self.position + self.SEARCH_WINDOW]
+        idx = self.position + int(np.searchsorted(window, due_ts, side='right')) - 1
+        if idx < self.position:
+            return None
+        self.position = idx + 1
+        self._index = idx
+        return self.capture.codes(idx, out=self._out)
+
+    def secondsUntilNextFrame(self):
+        """Wall-clock time until getLatestSamples() has a frame, or None once replay has ended."""
+        n = len(self.capture)
+        if n == 0 or (self.position >= n and not self.loop):
+            return None
+        if self._start_wall is None or self.position >= n:
+            return 0.0
+        ts = self.capture.timestamps
+        due_wall = self._start_wall + (ts[self.position] - self._start_ts) / self.speed
+        return max(0.0, due_wall - time.monotonic())
+
+    def releaseSamples(self, samples):
+        pass
+
+    def frameTimestamp(self, samples):
+        return float(self.capture.timestamps[self._index])
+
+    def frameSettings(self, samples):
+        """Settings recorded with the frame last returned by getLatestSamples()."""
+        return self.capture.settings(self._index)
+
+    # ── Live-reader API stubs ────────────────────────────────────────────
+
+    connected = True
+    wifiConnecting = False
+    autoConnecting = False
+
+    def connectWifi(self, ssid=None, password=None):
+        pass
+
+    def userDisconnect(self):
+        pass
+
+    def getWifiResult(self):
+        return None
+
+    def sendPacket(self, pkt):
+        pass
+
+    def close(self):
+        self.capture.close()
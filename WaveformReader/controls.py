@@ -1,6 +1,11 @@
-from PyQt5.QtWidgets import QComboBox, QLabel, QSlider, QVBoxLayout, QHBoxLayout, QDial, QPushButton
+from PyQt5.QtWidgets import (
+    QComboBox, QLabel, QSlider, QVBoxLayout, QHBoxLayout, QDial, QPushButton, QSpinBox,
+    QDoubleSpinBox,
+)
 from PyQt5.QtCore import Qt, pyqtSignal, QObject
 
+from trigger import BAND_MODES, TriggerSpec
+
 class ControlPanelSignals(QObject):
     value_changed = pyqtSignal(int, int)  # op_code, value
 
@@ -20,9 +25,24 @@ class ControlPanel:
     ]
     timebase_labels = ["5μs", "10μs", "20μs", "50μs", "100μs"]
 
-    def __init__(self):
+    TRIGGER_MODES = {
+        "Off": 'off',
+        "Rising Edge": 'rising',
+        "Falling Edge": 'falling',
+        "Pulse Width <": 'pulse_lt',
+        "Pulse Width >": 'pulse_gt',
+        "Pulse Width Range": 'pulse_range',
+        "Glitch": 'glitch',
+        "Runt": 'runt',
+        "Window Enter": 'window_enter',
+        "Window Exit": 'window_exit',
+    }
+
+    def __init__(self, display_size=1000):
+        """display_size: samples in a triggered record, i.e. across the 10 display divisions."""
         self.layout = QVBoxLayout()
         self.signals = ControlPanelSignals()
+        self.display_size = display_size
 
         # --- Mode selector ---
         mode_row = QHBoxLayout()
@@ -117,12 +137,50 @@ class ControlPanel:
         trigger_row = QHBoxLayout()
         self.trigger_label = QLabel("Trigger:")
         self.trigger_select = QComboBox()
-        self.trigger_select.addItems(["Off", "Rising Edge", "Falling Edge"])
+        self.trigger_select.addItems(list(self.TRIGGER_MODES))
         self.trigger_select.setCurrentIndex(1)
         trigger_row.addWidget(self.trigger_label)
         trigger_row.addWidget(self.trigger_select)
+
+        # Hysteresis: how far past the level the signal must swing to re-arm
+        self.trigger_hyst_label = QLabel("Hysteresis:")
+        self.trigger_hyst_spin = QSpinBox()
+        self.trigger_hyst_spin.setRange(0, 1000)
+        self.trigger_hyst_spin.setSingleStep(10)
+        self.trigger_hyst_spin.setSuffix(" mV")
+        self.trigger_hyst_spin.setValue(0)
+        trigger_row.addWidget(self.trigger_hyst_label)
+        trigger_row.addWidget(self.trigger_hyst_spin)
         self.layout.addLayout(trigger_row)
 
+        # --- Pulse / glitch / runt / window trigger options ---
+        trigger_opts_row = QHBoxLayout()
+        self.trigger_polarity_select = QComboBox()
+        self.trigger_polarity_select.addItems(["Positive", "Negative"])
+        trigger_opts_row.addWidget(self.trigger_polarity_select)
+
+        self.trigger_min_width_spin = QDoubleSpinBox()
+        self.trigger_max_width_spin = QDoubleSpinBox()
+        for spin, prefix, value in ((self.trigger_min_width_spin, "Min ", 1.0),
+                                    (self.trigger_max_width_spin, "Max ", 10.0)):
+            spin.setRange(0.0, 10000.0)
+            spin.setDecimals(2)
+            spin.setPrefix(prefix)
+            spin.setSuffix(" μs")
+            spin.setValue(value)
+            trigger_opts_row.addWidget(spin)
+
+        self.trigger_level2_spin = QSpinBox()
+        self.trigger_level2_spin.setRange(-20000, 20000)
+        self.trigger_level2_spin.setSingleStep(50)
+        self.trigger_level2_spin.setPrefix("Level 2: ")
+        self.trigger_level2_spin.setSuffix(" mV")
+        self.trigger_level2_spin.setValue(500)
+        trigger_opts_row.addWidget(self.trigger_level2_spin)
+        self.layout.addLayout(trigger_opts_row)
+
+        self.trigger_select.currentIndexChanged.connect(self._updateTriggerOptions)
+
         # --- Trigger level ---
         trigger_level_row = QHBoxLayout()
         self.trigger_level_label = QLabel("Trigger Level:")
@@ -151,6 +209,7 @@ class ControlPanel:
 
         self._trigger_level_mv = 0
         self._trigger_level_step_mv = 50
+        self._updateTriggerOptions()
 
         # Previous-value tracking for change detection
         self._prev_vert_knob = self.vert_knob.value()
@@ -249,6 +308,17 @@ class ControlPanel:
             sign = "+" if mv > 0 else ""
             self.trigger_level_value_label.setText(f"{sign}{mv}mV")
 
+    def _updateTriggerOptions(self):
+        """Show only the options the selected trigger type uses."""
+        mode = self.getTriggerMode()
+        self.trigger_polarity_select.setVisible(
+            mode in ('pulse_lt', 'pulse_gt', 'pulse_range', 'runt'))
+        self.trigger_min_width_spin.setVisible(mode in ('pulse_gt', 'pulse_range'))
+        self.trigger_max_width_spin.setVisible(mode in ('pulse_lt', 'pulse_range', 'glitch'))
+        self.trigger_level2_spin.setVisible(mode in BAND_MODES)
+        self.trigger_hyst_label.setVisible(mode in ('rising', 'falling'))
+        self.trigger_hyst_spin.setVisible(mode in ('rising', 'falling'))
+
     def _onTriggerLevelUp(self):
         self._trigger_level_mv += self._trigger_level_step_mv
         self.updateTriggerLevelLabel()
@@ -311,14 +381,24 @@ class ControlPanel:
         return self.vert_off_slider.value() * 12.0 / 1000.0
 
     def getHorzOffset(self):
+        """Slider position, in thousandths of the display width."""
         return self.horz_off_slider.value()
 
+    def getHorzOffsetSamples(self):
+        return round(self.horz_off_slider.value() * self.display_size / 1000)
+
+    def getSamplePeriod(self):
+        """Seconds between samples: 10 calibrated divisions across display_size samples."""
+        return (10 * self.getHorizontalDiv() * self.TIMEBASE_CAL) / self.display_size
+
+    def getSampleRate(self):
+        return 1.0 / self.getSamplePeriod()
+
     def getHorzOffsetDisplay(self):
-        val = self.horz_off_slider.value()
+        val = self.getHorzOffsetSamples()
         if val == 0:
             return "0μs"
-        time_per_sample = (10 * self.getHorizontalDiv() * self.TIMEBASE_CAL) / 1000.0
-        t = val * time_per_sample
+        t = val * self.getSamplePeriod()
         sign = "+" if t > 0 else "-"
         a = abs(t)
         if a >= 1e-3:
@@ -331,12 +411,26 @@ class ControlPanel:
         return self.voltage_multiplier
 
     def getTriggerMode(self):
-        text = self.trigger_select.currentText()
-        if text == "Rising Edge":
-            return 'rising'
-        if text == "Falling Edge":
-            return 'falling'
-        return 'off'
+        return self.TRIGGER_MODES.get(self.trigger_select.currentText(), 'off')
 
     def getTriggerLevelVolts(self):
         return self._trigger_level_mv / 1000.0
+
+    def getTriggerHysteresisVolts(self):
+        return self.trigger_hyst_spin.value() / 1000.0
+
+    def getTriggerLevel2Volts(self):
+        return self.trigger_level2_spin.value() / 1000.0
+
+    def getTriggerSpec(self):
+        """Full trigger configuration, with pulse widths converted to samples."""
+        sample_period_us = self.getSamplePeriod() * 1e6
+        return TriggerSpec(
+            mode=self.getTriggerMode(),
+            level=self.getTriggerLevelVolts(),
+            hysteresis=self.getTriggerHysteresisVolts(),
+            level2=self.getTriggerLevel2Volts(),
+            min_width=self.trigger_min_width_spin.value() / sample_period_us,
+            max_width=self.trigger_max_width_spin.value() / sample_period_us,
+            polarity=self.trigger_polarity_select.currentText().lower(),
+        )
@@ -0,0 +1,258 @@
+"""Stand-alone PocketProbe emulator speaking the esp32.ino TCP protocol.
+
+Streams length-prefixed frames (2-byte big-endian length, then frame_size
+big-endian uint16 ADC words) and periodic 2-byte battery messages, and
+accepts the 6-byte <H op><I value> knob packets, including the sleep/wake
+opcode. Point the GUI at it with: python main.py --host 127.0.0.1 --port 8080
+"""
+import argparse
+import random
+import socket
+import struct
+import threading
+import time
+
+import numpy as np
+
+from tcpWaveformReader import GPIO_MASK, MAX_FRAME_SIZE, VREF
+
+OP_VERT, OP_TIME, OP_OFFSET, OP_SLEEP = 1, 2, 3, 4
+KNOB_PACKET = struct.Struct('<HI')
+NUM_PHASES = 64  # precomputed frames cycled through so streaming does no synthesis
+
+# Bit-reverse every 12-bit value once; convert() undoes exactly this
+_BIT_REVERSE = np.array([int(f'{v:012b}'[::-1], 2) for v in range(GPIO_MASK + 1)], dtype=np.uint16)
+
+
+def encodeVolts(volts):
+    """Inverse of tcpWaveformReader.convert(): normalized volts -> wire words."""
+    signed = np.clip(np.round(np.asarray(volts) / VREF * 2048), -2048, 2047).astype(np.int64)
+    return _BIT_REVERSE[signed & GPIO_MASK].astype('>u2')
+
+
+def synthesize(waveform, t, amplitude, noise, rng):
+    """Waveform value at phase t (in cycles), normalized volts."""
+    frac = t % 1.0
+    if waveform == 'sine':
+        y = np.sin(2 * np.pi * t)
+    elif waveform == 'square':
+        y = np.where(frac < 0.5, 1.0, -1.0)
+    elif waveform == 'triangle':
+        y = 4 * np.abs(frac - 0.5) - 1
+    elif waveform == 'sawtooth':
+        y = 2 * frac - 1
+    elif waveform == 'dc':
+        y = np.ones_like(t)
+    else:
+        raise ValueError(f"Unknown waveform: {waveform}")
+    y = amplitude * y
+    if noise:
+        y = y + rng.normal(0, noise, len(t))
+    return y
+
+
+class ProbeEmulator:
+    """TCP server that behaves like one PocketProbe (one client at a time)."""
+
+    def __init__(self, host='127.0.0.1', port=8080, frame_size=2000, fps=60, jitter=0.0,
+                 waveform='sine', cycles=5.3, amplitude=0.05, noise=0.0,
+                 fragment=0, drop_after=0.0, battery_interval=10.0, battery=80, seed=0,
+                 verbose=False):
+        if not 0 < frame_size <= MAX_FRAME_SIZE:
+            raise ValueError(f"TCP frames hold 1..{MAX_FRAME_SIZE} samples, got {frame_size}")
+        self.frame_size = frame_size
+        self.fps = fps
+        self.jitter = jitter
+        self.waveform = waveform
+        self.cycles = cycles
+        self.amplitude = amplitude
+        self.noise = noise
+        self.fragment = fragment
+        self.drop_after = drop_after
+        self.battery_interval = battery_interval
+        self.battery = battery
+        self.verbose = verbose
+        self.rng = np.random.default_rng(seed)
+        self._random = random.Random(seed)
+
+        self.awake = True
+        self.timebase_divisor = 1
+        self.commands = []  # (op, value) in arrival order
+        self.frames_sent = 0
+        self.connections = 0
+
+        self._messages = []
+        self._buildFrames()
+        self._stop = threading.Event()
+        self.server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.server.bind((host, port))
+        self.server.listen(1)
+        self.server.settimeout(0.2)
+        self.host, self.port = self.server.getsockname()[:2]
+        self._thread = threading.Thread(target=self._serve, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def close(self):
+        self._stop.set()
+        self.server.close()
+        if self._thread.is_alive():
+            self._thread.join(timeout=2)
+
+    def _buildFrames(self):
+        """Precompute NUM_PHASES length-prefixed frames, each advancing the waveform phase."""
+        n = self.frame_size
+        cycles = self.cycles * self.timebase_divisor
+        idx = np.arange(n) / n
+        messages = []
+        for k in range(NUM_PHASES):
+            t = cycles * idx + (k * cycles) % 1.0
+            payload = encodeVolts(synthesize(self.waveform, t, self.amplitude, self.noise, self.rng))
+            messages.append(struct.pack('>H', 2 * n) + payload.tobytes())
+        self._messages = messages
+
+    def _batteryMessage(self):
+        charging = self.battery is None
+        return bytes([0x00, 0x02, 1 if charging else 0, 0 if charging else self.battery])
+
+    # ── Server loop ──────────────────────────────────────────────────────
+
+    def _serve(self):
+        while not self._stop.is_set():
+            try:
+                conn, addr = self.server.accept()
+            except socket.timeout:
+                continue
+            except OSError:
+                return
+            self.connections += 1
+            if self.verbose:
+                print(f"Client connected: {addr[0]}:{addr[1]}")
+            conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            try:
+                self._stream(conn)
+            except OSError:
+                pass
+            finally:
+                conn.close()
+                if self.verbose:
+                    print("Client disconnected")
+
+    def _stream(self, conn):
+        rx = bytearray()
+        connected_at = time.perf_counter()
+        next_frame = connected_at
+        next_battery = connected_at
+        phase = 0
+        while not self._stop.is_set():
+            now = time.perf_counter()
+            if self.drop_after and now - connected_at >= self.drop_after:
+                if self.verbose:
+                    print("Dropping connection")
+                return
+
+            self._pollCommands(conn, rx)
+
+            if now >= next_battery:
+                self._send(conn, self._batteryMessage())
+                next_battery = now + self.battery_interval
+
+            if self.awake and now >= next_frame:
+                self._send(conn, self._messages[phase])
+                phase = (phase + 1) % len(self._messages)
+                self.frames_sent += 1
+                period = 1.0 / self.fps
+                if self.jitter:
+                    period = max(0.0, period + self._random.gauss(0, self.jitter))
+                next_frame += period
+                if next_frame < now - 1.0:
+                    next_frame = now  # fell far behind: don't burst to catch up
+            else:
+                wake = next_frame if self.awake else now + 0.01
+                time.sleep(min(max(0.0, wake - time.perf_counter()), 0.01))
+
+    def _send(self, conn, message):
+        if not self.fragment:
+            conn.sendall(message)
+            return
+        # Split into random-sized pieces to exercise the reader's reassembly
+        pos = 0
+        while pos < len(message):
+            size = self._random.randint(1, self.fragment)
+            conn.sendall(message[pos:pos + size])
+            pos += size
+
+    def _pollCommands(self, conn, rx):
+        conn.setblocking(False)
+        try:
+            data = conn.recv(4096)
+            if not data:
+                raise ConnectionResetError
+            rx += data
+        except BlockingIOError:
+            pass
+        finally:
+            conn.setblocking(True)
+        while len(rx) >= KNOB_PACKET.size:
+            op, value = KNOB_PACKET.unpack_from(rx)
+            del rx[:KNOB_PACKET.size]
+            self._handleCommand(op, value)
+
+    def _handleCommand(self, op, value):
+        self.commands.append((op, value))
+        if self.verbose:
+            print(f"Command received - OpCode: {op}, Value: {value}")
+        if op == OP_SLEEP:
+            self.awake = value != 0
+        elif op == OP_TIME:
+            self.timebase_divisor = max(1, value)
+            self._buildFrames()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--frame-size", type=int, default=2000)
+    parser.add_argument("--fps", type=float, default=60, help="frames per second")
+    parser.add_argument("--jitter", type=float, default=0.0,
+                        help="std-dev of frame period jitter, seconds")
+    parser.add_argument("--waveform", default="sine",
+                        choices=["sine", "square", "triangle", "sawtooth", "dc"])
+    parser.add_argument("--cycles", type=float, default=5.3,
+                        help="waveform cycles per frame at the fastest timebase")
+    parser.add_argument("--amplitude", type=float, default=0.05,
+                        help="peak amplitude at the ADC, normalized volts")
+    parser.add_argument("--noise", type=float, default=0.0,
+                        help="std-dev of added Gaussian noise, normalized volts")
+    parser.add_argument("--fragment", type=int, default=0,
+                        help="split messages into random sends of at most N bytes")
+    parser.add_argument("--drop-after", type=float, default=0.0,
+                        help="close each connection after N seconds to exercise reconnects")
+    parser.add_argument("--battery", type=int, default=80,
+                        help="battery percentage to report (-1 for charging)")
+    parser.add_argument("--battery-interval", type=float, default=10.0)
+    args = parser.parse_args()
+
+    emu = ProbeEmulator(
+        host=args.host, port=args.port, frame_size=args.frame_size, fps=args.fps,
+        jitter=args.jitter, waveform=args.waveform, cycles=args.cycles,
+        amplitude=args.amplitude, noise=args.noise, fragment=args.fragment,
+        drop_after=args.drop_after, battery_interval=args.battery_interval,
+        battery=None if args.battery < 0 else args.battery, verbose=True,
+    ).start()
+    print(f"PocketProbe emulator on {emu.host}:{emu.port} ({args.fps:g} frames/s)")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        emu.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+import numpy as np
+
+NETWORK_MAX_SIZE = 4  # scipy's own filter is faster for larger windows
+
+
+class SlidingMedian:
+    """1-D sliding median, a drop-in for scipy.ndimage.median_filter(y, size).
+
+    Windows of up to NETWORK_MAX_SIZE samples run a hand-pruned min/max
+    sorting network over shifted views of one padded buffer, with scratch
+    buffers kept between calls. Within that range the output matches scipy
+    exactly: 'reflect' edges (d c b a | a b c d | d c b a), the window for
+    sample i spans [i - size // 2, i + (size - 1) // 2], and even sizes
+    return the upper of the two middle values (rank size // 2). Larger
+    windows, where the network no longer wins, are scipy.ndimage's own
+    median_filter, imported on first use so scipy stays out of startup.
+    The output may be the input array itself, to filter in place.
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self._padded = None
+        self._scratch = None
+        self._buffer_key = None
+
+    @property
+    def size(self):
+        return self._size
+
+    @size.setter
+    def size(self, size):
+        if size < 1:
+            raise ValueError(f"Median window must be at least 1 sample, got {size}")
+        self._size = int(size)
+
+    def _buffers(self, n, dtype):
+        key = (n, self._size, dtype)
+        if key != self._buffer_key:
+            self._buffer_key = key
+            self._padded = np.empty(n + self._size - 1, dtype=dtype)
+            self._scratch = np.empty((2, n), dtype=dtype)
+        return self._padded, self._scratch
+
+    def _pad(self, y, padded):
+        """Copy y into padded with reflected edges, like np.pad(mode='symmetric')."""
+        n = len(y)
+        left = self._size // 2
+        right = self._size - 1 - left
+        if n < self._size:
+            padded[:] = np.pad(y, (left, right), mode='symmetric')
+            return
+        padded[left:left + n] = y
+        if left:
+            padded[:left] = y[left - 1::-1]
+        if right:
+            padded[left + n:] = y[:n - right - 1:-1]
+
+    def __call__(self, y, out=None):
+        y = np.asarray(y)
+        n = len(y)
+        if out is None:
+            out = np.empty_like(y)
+        size = self._size
+        if size == 1 or n == 0:
+            out[:] = y
+            return out
+        if size > NETWORK_MAX_SIZE:
+            from scipy.ndimage import median_filter
+            median_filter(y, size=size, output=out)
+            return out
+
+        padded, scratch = self._buffers(n, y.dtype)
+        self._pad(y, padded)
+        w = [padded[k:k + n] for k in range(size)]
+        lo, hi = scratch[0], scratch[1]
+
+        if size == 2:
+            np.maximum(w[0], w[1], out=out)
+        elif size == 3:
+            # median = max(min(a, b), min(max(a, b), c))
+            np.minimum(w[0], w[1], out=lo)
+            np.maximum(w[0], w[1], out=hi)
+            np.minimum(hi, w[2], out=hi)
+            np.maximum(lo, hi, out=out)
+        else:
+            # 3rd smallest of 4 = max(min(max(a, b), max(c, d)), max(min(a, b), min(c, d)))
+            np.maximum(w[0], w[1], out=hi)
+            np.maximum(w[2], w[3], out=lo)
+            np.minimum(hi, lo, out=hi)
+            np.minimum(w[0], w[1], out=lo)
+            np.minimum(w[2], w[3], out=out)
+            np.maximum(lo, out, out=lo)
+            np.maximum(hi, lo, out=out)
+        return out
@@ -0,0 +1,89 @@
+import collections
+import queue
+
+DELIVERY_LATEST = 'latest'
+DELIVERY_FIFO = 'fifo'
+
+
+class LatestFrameMailbox:
+    """Single-slot mailbox for live view: a new frame overwrites an unread one.
+
+    Uses a one-element deque, whose append/popleft are atomic, so the reader
+    thread and the consumer never take a lock. The consumer always gets the
+    newest frame, which bounds display latency to one frame. on_put, if set,
+    is called on the reader thread after every frame, so a consumer can
+    block until one arrives instead of polling.
+    """
+
+    def __init__(self, on_discard=None):
+        self._slot = collections.deque(maxlen=1)
+        self._on_discard = on_discard
+        self.on_put = None
+        self.delivered = 0
+        self.overwritten = 0
+        self.dropped = 0
+
+    def put(self, frame):
+        try:
+            stale = self._slot.popleft()
+        except IndexError:
+            stale = None
+        self._slot.append(frame)
+        if stale is not None:
+            self.overwritten += 1
+            if self._on_discard is not None:
+                self._on_discard(stale)
+        if self.on_put is not None:
+            self.on_put()
+
+    def get(self):
+        """Return the newest unread frame, or None."""
+        try:
+            frame = self._slot.popleft()
+        except IndexError:
+            return None
+        self.delivered += 1
+        return frame
+
+
+class FrameFifo:
+    """Bounded FIFO for recording: every frame is kept in order until the queue fills,
+    then new frames are dropped. on_put is called as for LatestFrameMailbox."""
+
+    def __init__(self, maxsize=10, put_timeout=0.1, on_discard=None):
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._put_timeout = put_timeout
+        self._on_discard = on_discard
+        self.on_put = None
+        self.delivered = 0
+        self.overwritten = 0
+        self.dropped = 0
+
+    def put(self, frame):
+        try:
+            self._queue.put(frame, timeout=self._put_timeout)
+        except queue.Full:
+            self.dropped += 1
+            if self._on_discard is not None:
+                self._on_discard(frame)
+            return
+        if self.on_put is not None:
+            self.on_put()
+
+    def get(self):
+        """Return the oldest unread frame, or None."""
+        try:
+            frame = self._queue.get_nowait()
+        except queue.Empty:
+            return None
+        self.delivered += 1
+        return frame
+
+
+def makeDelivery(policy, maxsize=10, on_discard=None):
+    """Build the frame delivery object for a policy name ('latest' or 'fifo')."""
+    if policy == DELIVERY_LATEST:
+        return LatestFrameMailbox(on_discard=on_discard)
+    if policy == DELIVERY_FIFO:
+        return FrameFifo(maxsize=maxsize, on_discard=on_discard)
+    raise ValueError(f"Unknown delivery policy: {policy}")
@@ -0,0 +1,51 @@
+import threading
+
+import numpy as np
+
+
+class FramePool:
+    """Fixed set of preallocated frame slots shared by a reader and its consumer.
+
+    Each slot owns a raw receive buffer (filled with sock.recv_into) and a
+    decoded sample array. The reader acquires a free slot, fills it and hands
+    the sample array to the consumer, which returns it with release() once
+    done. Frames are never allocated on the hot path.
+    """
+
+    def __init__(self, frame_size, num_slots=16, dtype=np.float64):
+        self.frame_size = frame_size
+        self.num_slots = num_slots
+        self.raw = [bytearray(frame_size * 2) for _ in range(num_slots)]
+        self.raw_views = [memoryview(buf) for buf in self.raw]
+        self.samples = np.zeros((num_slots, frame_size), dtype=dtype)
+        self.timestamps = np.zeros(num_slots)
+        # Stable per-slot views so a handed-out frame can be mapped back to its slot
+        self._frames = [self.samples[i] for i in range(num_slots)]
+        self._slot_of = {id(frame): i for i, frame in enumerate(self._frames)}
+        self._free = list(range(num_slots))
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Return a free slot index, or None if every slot is in use."""
+        with self._lock:
+            return self._free.pop() if self._free else None
+
+    def frame(self, slot):
+        return self._frames[slot]
+
+    def slotOf(self, frame):
+        """Return the slot index backing frame, or None if it is not a pool frame."""
+        return self._slot_of.get(id(frame))
+
+    def release(self, frame):
+        """Return a frame (or slot index) to the pool. Unknown frames are ignored."""
+        slot = frame if isinstance(frame, int) else self.slotOf(frame)
+        if slot is None:
+            return
+        with self._lock:
+            if slot not in self._free:
+                self._free.append(slot)
+
+    @property
+    def available(self):
+        return len(self._free)
@@ -0,0 +1,77 @@
+import threading
+
+import numpy as np
+
+
+class FrameHistory:
+    """Fixed-capacity ring of the most recent raw frames, for scroll-back in Stop mode.
+
+    Raw 12-bit codes are kept as uint16 together with each frame's receive
+    timestamp and the (gain, offset_steps) it was acquired with, so a past
+    frame can be calibrated, triggered and measured again exactly like a live
+    one. append() is one row copy into preallocated memory; np.empty leaves
+    the pages untouched until the ring first fills them.
+
+    The processing worker appends; the GUI reads while the worker idles in
+    Stop. A lock keeps a read from ever seeing a half-written row.
+    """
+
+    def __init__(self, capacity, frame_size):
+        if capacity < 1:
+            raise ValueError(f"History must hold at least one frame, got {capacity}")
+        self.capacity = capacity
+        self.frame_size = frame_size
+        self.codes = np.empty((capacity, frame_size), dtype=np.uint16)
+        self.timestamps = np.full(capacity, np.nan)
+        self.gains = np.zeros(capacity, dtype=np.int32)
+        self.offset_steps = np.zeros(capacity, dtype=np.int32)
+        self.decode_table = None
+        self._next = 0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def fromBudget(cls, budget_bytes, frame_size):
+        """As many frames as fit in budget_bytes of raw codes."""
+        return cls(max(1, budget_bytes // (frame_size * 2)), frame_size)
+
+    def __len__(self):
+        return self._count
+
+    def append(self, codes, timestamp, gain, offset_steps, decode_table):
+        with self._lock:
+            i = self._next
+            self.codes[i] = codes
+            self.timestamps[i] = np.nan if timestamp is None else timestamp
+            self.gains[i] = gain
+            self.offset_steps[i] = offset_steps
+            self.decode_table = decode_table
+            self._next = (i + 1) % self.capacity
+            self._count = min(self._count + 1, self.capacity)
+
+    def clear(self):
+        with self._lock:
+            self._next = 0
+            self._count = 0
+
+    def frame(self, age):
+        """(codes copy, timestamp, gain, offset_steps) of the frame age frames before the newest."""
+        with self._lock:
+            if not 0 <= age < self._count:
+                raise IndexError(f"History holds {self._count} frames, asked for age {age}")
+            i = (self._next - 1 - age) % self.capacity
+            timestamp = self.timestamps[i]
+            return (
+                self.codes[i].copy(),
+                None if np.isnan(timestamp) else float(timestamp),
+                int(self.gains[i]),
+                int(self.offset_steps[i]),
+            )
+
+    def timestamp(self, age):
+        """Receive time of the frame age frames before the newest, or None."""
+        with self._lock:
+            if not 0 <= age < self._count:
+                return None
+            t = self.timestamps[(self._next - 1 - age) % self.capacity]
+            return None if np.isnan(t) else float(t)
@@ -0,0 +1,129 @@
+import math
+import time
+
+import numpy as np
+
+HIST_MIN = 1e-6          # durations at or below 1 µs land in the first bin
+HIST_DECADES = 7         # 1 µs .. 10 s
+BINS_PER_DECADE = 20     # ~12 % bin width, so percentiles are within ~6 %
+
+# Pipeline order: recv/decode on the reader thread, draw/frame_age on the GUI
+# thread, the rest on the processing worker
+STAGES = (
+    'recv', 'decode', 'queue_wait', 'calibrate', 'median_filter', 'spectrum',
+    'trigger', 'average', 'decimate', 'measurements', 'draw', 'frame_age',
+)
+COUNTERS = ('received', 'dropped', 'drawn')
+
+
+class StageHistogram:
+    """Fixed-size log-binned histogram of durations in seconds.
+
+    add() is a log10 and a list increment, cheap enough to call per frame
+    from the reader thread; memory does not grow with the number of samples.
+    """
+
+    NUM_BINS = HIST_DECADES * BINS_PER_DECADE + 2  # plus underflow and overflow
+    # Upper edge of each bin; the overflow bin reports the top of the range
+    UPPER_EDGES = np.append(
+        HIST_MIN * 10.0 ** (np.arange(NUM_BINS - 1) / BINS_PER_DECADE),
+        HIST_MIN * 10.0 ** HIST_DECADES,
+    )
+
+    def __init__(self):
+        self.counts = [0] * self.NUM_BINS
+        self.total = 0
+
+    def add(self, seconds):
+        if seconds <= HIST_MIN:
+            i = 0
+        else:
+            i = min(int(math.log10(seconds / HIST_MIN) * BINS_PER_DECADE) + 1, self.NUM_BINS - 1)
+        self.counts[i] += 1
+        self.total += 1
+
+    def percentile(self, p):
+        """Upper edge of the bin holding the p-th percentile, or None when empty."""
+        counts = np.array(self.counts)
+        n = counts.sum()
+        if n == 0:
+            return None
+        i = int(np.searchsorted(np.cumsum(counts), p / 100.0 * n))
+        return float(self.UPPER_EDGES[min(i, self.NUM_BINS - 1)])
+
+    def reset(self):
+        self.counts = [0] * self.NUM_BINS
+        self.total = 0
+
+
+class PipelineProfiler:
+    """Per-stage duration histograms and frame counters for the acquisition pipeline.
+
+    Readers and scopeGUI hold a `profiler` attribute that is None when
+    profiling is off, so a disabled hook costs one attribute load and an
+    `is None` test. Stage durations use time.perf_counter(); frame ages
+    compare against reader timestamps and so use time.monotonic().
+    """
+
+    def __init__(self, stages=STAGES):
+        self.histograms = {stage: StageHistogram() for stage in stages}
+        self.counters = dict.fromkeys(COUNTERS, 0)
+        self._rate_counters = dict(self.counters)
+        self._rate_time = time.monotonic()
+
+    @staticmethod
+    def start():
+        return time.perf_counter()
+
+    def lap(self, stage, t0):
+        """Record the time since t0 under stage and return now, to chain the next stage."""
+        now = time.perf_counter()
+        self.histograms[stage].add(now - t0)
+        return now
+
+    def record(self, stage, seconds):
+        self.histograms[stage].add(seconds)
+
+    def count(self, counter, n=1):
+        self.counters[counter] += n
+
+    def rates(self):
+        """Per-second counter rates since the previous call."""
+        now = time.monotonic()
+        elapsed = max(now - self._rate_time, 1e-9)
+        counters = dict(self.counters)
+        rates = {k: (counters[k] - self._rate_counters[k]) / elapsed for k in counters}
+        self._rate_counters = counters
+        self._rate_time = now
+        return rates
+
+    def summary(self):
+        """{stage: (p50, p99, count)} for every stage that has samples."""
+        return {
+            stage: (h.percentile(50), h.percentile(99), h.total)
+            for stage, h in self.histograms.items() if h.total
+        }
+
+    def formatReport(self, rates=None):
+        """Text table of p50/p99 per stage, followed by counter rates."""
+        lines = [f"{'stage':<14}{'p50':>10}{'p99':>10}"]
+        for stage, (p50, p99, _) in self.summary().items():
+            lines.append(f"{stage:<14}{_formatDuration(p50):>10}{_formatDuration(p99):>10}")
+        if rates is not None:
+            lines.append("  ".join(f"{k} {v:.0f}/s" for k, v in rates.items()))
+        return "\n".join(lines)
+
+    def reset(self):
+        for h in self.histograms.values():
+            h.reset()
+        self.counters = dict.fromkeys(self.counters, 0)
+        self._rate_counters = dict(self.counters)
+        self._rate_time = time.monotonic()
+
+
+def _formatDuration(seconds):
+    if seconds >= 1:
+        return f"{seconds:.2f} s"
+    if seconds >= 1e-3:
+        return f"{seconds * 1e3:.2f} ms"
+    return f"{seconds * 1e6:.0f} µs"
@@ -1,6 +1,9 @@
 from PyQt5.QtWidgets import QApplication
+import argparse
 import sys
 from scopeGUI import scopeGUI
+from tcpWaveformReader import TCPWaveformReader
+from frameDelivery import DELIVERY_LATEST
 
 def apply_stylesheet(app):
     style = '''
@@ -59,10 +62,71 @@ def apply_stylesheet(app):
     app.setStyleSheet(style)
 
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="PocketProbe oscilloscope")
+    parser.add_argument("--async-reader", action="store_true",
+                        help="use the asyncio acquisition engine instead of a reader thread")
+    parser.add_argument("--host", default=None,
+                        help="probe address (default 192.168.4.1); streams immediately without WiFi")
+    parser.add_argument("--port", type=int, default=None, help="probe TCP port (default 8080)")
+    parser.add_argument("--probe", action="append", default=[], type=parse_probe,
+                        metavar="NAME=HOST:PORT",
+                        help="stream an extra probe and overlay it (repeatable)")
+    parser.add_argument("--serial", metavar="PORT",
+                        help="stream from a serial port (e.g. COM3 or /dev/ttyUSB0) instead of "
+                             "WiFi; receive only, so the probe keeps its own settings")
+    parser.add_argument("--baud", type=int, default=None,
+                        help="serial baud rate (default 115200)")
+    parser.add_argument("--replay", metavar="CAPTURE",
+                        help="replay a recorded .ppcap capture instead of connecting to a probe")
+    parser.add_argument("--history-mb", type=int, default=None,
+                        help="memory for the Stop-mode frame history, in MB (default 64)")
+    parser.add_argument("--frame-size", type=int, default=2000,
+                        help="samples per probe frame (default 2000; ignored with --replay)")
+    parser.add_argument("--display-size", type=int, default=None,
+                        help="samples in the triggered record across the screen "
+                             "(default half the frame); drawn min/max decimated")
+    return parser.parse_args()
+
+
+def parse_probe(text):
+    name, _, addr = text.partition("=")
+    host, _, port = addr.rpartition(":")
+    if not name or not host or not port.isdigit():
+        raise argparse.ArgumentTypeError(f"expected NAME=HOST:PORT, got {text!r}")
+    return name, host, int(port)
+
+
 def main():
+    args = parse_args()
     app = QApplication(sys.argv)
     apply_stylesheet(app)
-    window = scopeGUI(2000)  # 2000 points per frame (trigger extracts 1000 for display)
+    frame_size = args.frame_size
+    probe_addr = {}
+    if args.host is not None:
+        probe_addr['host'] = args.host
+    if args.port is not None:
+        probe_addr['port'] = args.port
+    reader = None
+    if args.replay:
+        from capture import ReplayReader
+        reader = ReplayReader(args.replay)
+        frame_size = reader.frame_size
+    elif args.serial:
+        from serialReader import SerialWaveformReader
+        serial_opts = {} if args.baud is None else {'baud': args.baud}
+        reader = SerialWaveformReader(frame_size, port=args.serial, delivery=DELIVERY_LATEST,
+                                      **serial_opts)
+    elif args.async_reader or probe_addr:
+        if args.async_reader:
+            from asyncWaveformReader import AsyncWaveformReader
+            reader = AsyncWaveformReader(frame_size, **probe_addr)
+        else:
+            reader = TCPWaveformReader(frame_size, delivery=DELIVERY_LATEST, **probe_addr)
+        if probe_addr:
+            reader.connect()
+    window = scopeGUI(frame_size, reader=reader, probes=args.probe, history_mb=args.history_mb,
+                      display_size=args.display_size)
     window.showMaximized()
     sys.exit(app.exec_())
 
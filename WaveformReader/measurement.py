@@ -1,3 +1,6 @@
+import collections
+import functools
+
 import numpy as np
 from PyQt5.QtWidgets import (
     QWidget, QVBoxLayout, QLabel, QCheckBox, QListWidget,
@@ -7,26 +10,273 @@ from PyQt5.QtCore import Qt, QSize
 from PyQt5.QtGui import QFont
 from cursors import CursorManager
 
+HISTOGRAM_BINS = 256
+MODE_MIN_FRACTION = 0.02   # a top/base histogram mode needs this share of samples, else min/max
+REF_LOW, REF_MID, REF_HIGH = 0.1, 0.5, 0.9   # reference levels, fractions of base..top
+
+
+class FrameStats:
+    """Intermediates shared by the measurements of one frame, each computed on first use.
+
+    Top and base are the modes of the lower and upper halves of a sample
+    histogram (min / max when no level is dominant, e.g. a sine). Edges use
+    the 10 % / 90 % reference levels as hysteresis: an edge is a move from
+    beyond one to beyond the other, so noise around the midpoint does not
+    add edges. Edge times are fractional sample indices at the 50 % level.
+    """
+
+    def __init__(self, x, y):
+        self.y = np.asarray(y, dtype=np.float64)
+        x = np.asarray(x)
+        self.n = len(self.y)
+        self.dt = (x[-1] - x[0]) / (len(x) - 1) if len(x) > 1 else 0.0
+
+    @functools.cached_property
+    def min(self):
+        return float(self.y.min())
+
+    @functools.cached_property
+    def max(self):
+        return float(self.y.max())
+
+    @functools.cached_property
+    def mean(self):
+        return float(self.y.mean())
+
+    @functools.cached_property
+    def rms(self):
+        return float(np.sqrt(np.dot(self.y, self.y) / self.n))
+
+    @functools.cached_property
+    def topBase(self):
+        lo, hi = self.min, self.max
+        if hi == lo:
+            return hi, lo
+        scale = HISTOGRAM_BINS / (hi - lo)
+        bins = np.minimum(((self.y - lo) * scale).astype(np.intp), HISTOGRAM_BINS - 1)
+        counts = np.bincount(bins, minlength=HISTOGRAM_BINS)
+        half = HISTOGRAM_BINS // 2
+        base_bin = int(np.argmax(counts[:half]))
+        top_bin = half + int(np.argmax(counts[half:]))
+        threshold = MODE_MIN_FRACTION * self.n
+        base = lo + (base_bin + 0.5) / scale if counts[base_bin] >= threshold else lo
+        top = lo + (top_bin + 0.5) / scale if counts[top_bin] >= threshold else hi
+        return top, base
+
+    @property
+    def top(self):
+        return self.topBase[0]
+
+    @property
+    def base(self):
+        return self.topBase[1]
+
+    @property
+    def amplitude(self):
+        return self.top - self.base
+
+    def _level(self, fraction):
+        return self.base + fraction * self.amplitude
+
+    def _crossing(self, i, level):
+        """Fractional index where y crosses level between samples i - 1 and i."""
+        y0, y1 = self.y[i - 1], self.y[i]
+        return i - 1 + (level - y0) / (y1 - y0)
+
+    @functools.cached_property
+    def edges(self):
+        """(rising, falling) edges, each a (mid_times, transition_times) pair of arrays.
+
+        transition_times are 10-90 % (rising) or 90-10 % (falling) durations
+        in samples.
+        """
+        y = self.y
+        empty = (np.empty(0), np.empty(0))
+        if self.amplitude <= 0 or self.n < 2:
+            return empty, empty
+        low, mid, high = (self._level(f) for f in (REF_LOW, REF_MID, REF_HIGH))
+        above = y > high
+        decided = above | (y < low)
+        # Index of the latest sample beyond either reference level, at or before each sample
+        last = np.maximum.accumulate(np.where(decided, np.arange(self.n), -1))
+        state = above[last]
+        flips = np.flatnonzero((state[1:] != state[:-1]) & (last[:-1] >= 0)) + 1
+
+        def timing(flips, rising):
+            if len(flips) == 0:
+                return empty
+            near, far = (low, high) if rising else (high, low)
+            start = last[flips - 1] + 1          # first sample past the near level
+            t_near = self._crossing(start, near)
+            t_far = self._crossing(flips, far)
+            if rising:
+                cross = np.flatnonzero((y[:-1] < mid) & (y[1:] >= mid)) + 1
+            else:
+                cross = np.flatnonzero((y[:-1] > mid) & (y[1:] <= mid)) + 1
+            # The last midpoint crossing at or before the far-level crossing
+            c = cross[np.searchsorted(cross, flips, side='right') - 1]
+            return self._crossing(c, mid), t_far - t_near
+
+        rising = state[flips]
+        return timing(flips[rising], True), timing(flips[~rising], False)
+
+    @property
+    def risingTimes(self):
+        return self.edges[0][0]
+
+    @property
+    def fallingTimes(self):
+        return self.edges[1][0]
+
+    @functools.cached_property
+    def period(self):
+        """Mean edge-to-edge period in seconds, from rising edges (falling if too few)."""
+        for times in (self.risingTimes, self.fallingTimes):
+            if len(times) >= 2:
+                return float(np.mean(np.diff(times))) * self.dt
+        return None
+
+    def width(self, positive):
+        """Mean width in seconds of complete positive (or negative) pulses at the midpoint."""
+        starts, ends = (
+            (self.risingTimes, self.fallingTimes) if positive
+            else (self.fallingTimes, self.risingTimes)
+        )
+        if len(starts) == 0 or len(ends) == 0:
+            return None
+        k = np.searchsorted(ends, starts)
+        ok = k < len(ends)
+        if not ok.any():
+            return None
+        return float(np.mean(ends[k[ok]] - starts[ok])) * self.dt
+
+    def transition(self, rising):
+        times = self.edges[0 if rising else 1][1]
+        return float(np.mean(times)) * self.dt if len(times) else None
+
+
+def _ratio(numerator, denominator, scale=100.0):
+    if numerator is None or not denominator:
+        return None
+    return scale * numerator / denominator
+
+
+# Name -> (unit, fn(FrameStats)); fn returns None when the frame does not define it
+Measurement = collections.namedtuple('Measurement', ['unit', 'compute'])
+MEASUREMENTS = {
+    "Vpp":        Measurement('V', lambda s: s.max - s.min),
+    "Max":        Measurement('V', lambda s: s.max),
+    "Min":        Measurement('V', lambda s: s.min),
+    "Mean":       Measurement('V', lambda s: s.mean),
+    "RMS":        Measurement('V', lambda s: s.rms),
+    "AC RMS":     Measurement('V', lambda s: float(np.sqrt(max(s.rms ** 2 - s.mean ** 2, 0.0)))),
+    "Top":        Measurement('V', lambda s: s.top),
+    "Base":       Measurement('V', lambda s: s.base),
+    "Amplitude":  Measurement('V', lambda s: s.amplitude),
+    "Frequency":  Measurement('Hz', lambda s: 1.0 / s.period if s.period else None),
+    "Period":     Measurement('s', lambda s: s.period),
+    "Duty Cycle": Measurement('%', lambda s: _ratio(s.width(True), s.period)),
+    "+Width":     Measurement('s', lambda s: s.width(True)),
+    "-Width":     Measurement('s', lambda s: s.width(False)),
+    "Rise Time":  Measurement('s', lambda s: s.transition(True)),
+    "Fall Time":  Measurement('s', lambda s: s.transition(False)),
+    "Overshoot":  Measurement('%', lambda s: _ratio(s.max - s.top, s.amplitude)),
+    "Preshoot":   Measurement('%', lambda s: _ratio(s.base - s.min, s.amplitude)),
+}
+
+
+class MeasurementStatistics:
+    """Running current / mean / min / max / std-dev / count of every registered measurement.
+
+    One float64 array per statistic, indexed by registry position, updated
+    with Welford's algorithm: O(1) per measurement per frame and stable for
+    long runs. Frames where a measurement is undefined (None) are not counted.
+    """
+
+    INDEX = {key: i for i, key in enumerate(MEASUREMENTS)}
+
+    def __init__(self):
+        k = len(MEASUREMENTS)
+        self.count = np.zeros(k)
+        self.current = np.full(k, np.nan)
+        self.mean = np.zeros(k)
+        self._m2 = np.zeros(k)
+        self.min = np.full(k, np.inf)
+        self.max = np.full(k, -np.inf)
+
+    def reset(self, keys=None):
+        """Clear every measurement, or only keys."""
+        i = slice(None) if keys is None else [self.INDEX[k] for k in keys]
+        self.count[i] = 0
+        self.current[i] = np.nan
+        self.mean[i] = 0.0
+        self._m2[i] = 0.0
+        self.min[i] = np.inf
+        self.max[i] = -np.inf
+
+    def update(self, results):
+        """Add one frame's {name: value} results."""
+        defined = [(self.INDEX[k], v) for k, v in results.items() if v is not None]
+        if not defined:
+            return
+        i = np.fromiter((j for j, _ in defined), np.intp, len(defined))
+        v = np.fromiter((x for _, x in defined), np.float64, len(defined))
+        finite = np.isfinite(v)
+        i, v = i[finite], v[finite]
+        self.current[i] = v
+        self.count[i] += 1
+        delta = v - self.mean[i]
+        self.mean[i] += delta / self.count[i]
+        self._m2[i] += delta * (v - self.mean[i])
+        self.min[i] = np.minimum(self.min[i], v)
+        self.max[i] = np.maximum(self.max[i], v)
+
+    def get(self, key):
+        """(current, mean, min, max, std, count) of one measurement; None while it has no values."""
+        i = self.INDEX[key]
+        n = int(self.count[i])
+        if n == 0:
+            return None
+        std = float(np.sqrt(self._m2[i] / (n - 1))) if n > 1 else 0.0
+        return float(self.current[i]), float(self.mean[i]), float(self.min[i]), float(self.max[i]), std, n
+
+    def copy(self):
+        other = MeasurementStatistics.__new__(MeasurementStatistics)
+        for name in ('count', 'current', 'mean', '_m2', 'min', 'max'):
+            setattr(other, name, getattr(self, name).copy())
+        return other
+
 
 class MeasurementManager:
     def __init__(self):
         self.latest_x = None
         self.latest_y = None
+        self._results = None
 
-    def updateData(self, x, y):
+    def updateData(self, x, y, results=None):
+        """results: measurements already computed for this data, e.g. by the processing worker."""
         self.latest_x = np.asarray(x)
         self.latest_y = np.asarray(y)
-
-    def getMeasurements(self):
-        if self.latest_y is None or self.latest_x is None:
-            return {}
-        return {
-            "Vpp":       np.ptp(self.latest_y),
-            "Max":       np.max(self.latest_y),
-            "Min":       np.min(self.latest_y),
-            "Mean":      np.mean(self.latest_y),
-            "Frequency": self.estimateFrequency(self.latest_x, self.latest_y),
-        }
+        self._results = results
+
+    def getMeasurements(self, keys=None):
+        """{name: value} for keys (every registered measurement if None).
+
+        Precomputed results passed to updateData() are reused; only keys they
+        lack are evaluated, sharing one FrameStats.
+        """
+        keys = MEASUREMENTS if keys is None else keys
+        results = self._results or {}
+        missing = [k for k in keys if k not in results]
+        if not missing:
+            return results
+        results = dict(results)
+        if self.latest_y is None or self.latest_x is None or len(self.latest_y) == 0:
+            return results
+        stats = FrameStats(self.latest_x, self.latest_y)
+        for key in missing:
+            results[key] = MEASUREMENTS[key].compute(stats)
+        return results
 
     @staticmethod
     def estimateFrequency(x, y):
@@ -43,7 +293,7 @@ class MeasurementManager:
 
 
 class MeasurementPanel(QWidget):
-    MEASUREMENT_KEYS = ["Vpp", "Max", "Min", "Mean", "Frequency"]
+    MEASUREMENT_KEYS = list(MEASUREMENTS)
 
     def __init__(self, measurement_manager, plot_widget):
         super().__init__()
@@ -108,12 +358,21 @@ class MeasurementPanel(QWidget):
         self.add_button.clicked.connect(self.addMeasurement)
         meas_col.addWidget(self.add_button)
 
+        self.stats_toggle = QCheckBox("Show Statistics")
+        self.stats_toggle.setChecked(False)
+        self.stats_toggle.stateChanged.connect(self._onStatsToggled)
+        meas_col.addWidget(self.stats_toggle)
+
         self.measurement_list = QListWidget()
         meas_col.addWidget(self.measurement_list)
 
         self.main_layout.addLayout(meas_col, stretch=2)
 
         self.active_measurements = []
+        self.statistics = None  # MeasurementStatistics from the processing worker
+        # key -> [value label, statistics label, last value text, last statistics text]
+        self._rows = {}
+        self._prev_cursor_text = None
 
     # ── Add / remove measurements ────────────────────────────────────────
 
@@ -141,8 +400,14 @@ class MeasurementPanel(QWidget):
         value_label.setAlignment(Qt.AlignRight)
         value_label.setStyleSheet("font-size: 10pt; color: #e0e0e0; font-weight: bold;")
 
+        stats_label = QLabel()
+        stats_label.setAlignment(Qt.AlignRight)
+        stats_label.setStyleSheet("font-size: 9pt; color: #999;")
+        stats_label.setVisible(self.stats_toggle.isChecked())
+
         label_layout.addWidget(name_label)
         label_layout.addWidget(value_label)
+        label_layout.addWidget(stats_label)
         label_widget.setMinimumWidth(120)
         label_widget.setMinimumHeight(50)
 
@@ -156,30 +421,59 @@ class MeasurementPanel(QWidget):
         self.measurement_list.addItem(item)
         self.measurement_list.setItemWidget(item, widget)
 
+        self._rows[key] = [value_label, stats_label, None, None]
+
         def remove():
             self.measurement_list.takeItem(self.measurement_list.row(item))
             self.active_measurements.remove(key)
+            del self._rows[key]
 
         remove_btn.clicked.connect(remove)
 
     # ── Display update ───────────────────────────────────────────────────
 
     def updateDisplay(self):
+        """Refresh cursor and measurement text; labels whose text is unchanged are not touched."""
         cursor_values = self.cursor_mgr.getCursorValues()
         lines = [self._formatCursorValue(k, v) for k, v in cursor_values.items()]
-        self.cursor_values_label.setText("Cursor Values:\n" + "\n".join(lines))
+        text = "Cursor Values:\n" + "\n".join(lines)
+        if text != self._prev_cursor_text:
+            self._prev_cursor_text = text
+            self.cursor_values_label.setText(text)
 
-        stats = self.mm.getMeasurements()
-        for i in range(self.measurement_list.count()):
-            widget = self.measurement_list.itemWidget(self.measurement_list.item(i))
-            label_widget = widget.layout().itemAt(0).widget()
-            name = label_widget.layout().itemAt(0).widget().text()
-            value_lbl = label_widget.layout().itemAt(1).widget()
-            if name in stats:
-                value_lbl.setText(self._formatMeasurement(name, stats[name]))
+        if not self._rows:
+            return
+        stats = self.mm.getMeasurements(self.active_measurements)
+        show_stats = self.stats_toggle.isChecked()
+        for key, row in self._rows.items():
+            if key in stats:
+                text = self._formatMeasurement(key, stats[key])
+                if text != row[2]:
+                    row[2] = text
+                    row[0].setText(text)
+            if show_stats:
+                text = self._formatStatistics(key)
+                if text != row[3]:
+                    row[3] = text
+                    row[1].setText(text)
+
+    def setStatistics(self, statistics):
+        self.statistics = statistics
+
+    def _onStatsToggled(self, state):
+        for row in self._rows.values():
+            row[1].setVisible(state == Qt.Checked)
 
     # ── Formatting ───────────────────────────────────────────────────────
 
+    def _formatStatistics(self, key):
+        row = self.statistics.get(key) if self.statistics is not None else None
+        if row is None:
+            return "no statistics yet"
+        _, mean, lo, hi, std, count = row
+        fmt = lambda v: self._formatMeasurement(key, v)
+        return f"μ {fmt(mean)}  σ {fmt(std)}\nmin {fmt(lo)}  max {fmt(hi)}  n={count}"
+
     @staticmethod
     def _formatVoltage(value):
         if abs(value) >= 1:
@@ -207,12 +501,17 @@ class MeasurementPanel(QWidget):
 
     @classmethod
     def _formatMeasurement(cls, key, value):
-        if key == "Frequency":
-            if value == 0:
-                return "N/A"
+        if value is None:
+            return "N/A"
+        unit = MEASUREMENTS[key].unit
+        if unit == 'Hz':
             if value >= 1e6:
                 return f"{value/1e6:.3f} MHz"
             if value >= 1e3:
                 return f"{value/1e3:.3f} kHz"
             return f"{value:.3f} Hz"
+        if unit == 's':
+            return cls._formatTime(value)
+        if unit == '%':
+            return f"{value:.1f} %"
         return cls._formatVoltage(value)
@@ -0,0 +1,115 @@
+import collections
+import threading
+
+import numpy as np
+
+# Pixel grid the density buffer is rasterized on, plus the display span it
+# covers. Any change clears the accumulated history.
+PersistenceGrid = collections.namedtuple('PersistenceGrid', [
+    'width',     # columns, the plot's view box width in pixels
+    'height',    # rows, the view box height in pixels
+    'y_min',     # volts at the bottom edge
+    'y_max',     # volts at the top edge
+    'x_span',    # seconds across the display
+])
+
+
+class PersistenceBuffer:
+    """Hit-count density of every processed trace on a fixed pixel grid.
+
+    Each trace is rasterized as line segments: segment i, from sample i to
+    i + 1, lights every row between its end points in sample i's column.
+    The buffer stores those vertical runs as +1 / -1 row differences, so a
+    frame costs two np.add.at calls over len(trace) indices, independent of
+    the grid size; density() integrates the rows with one cumsum when a
+    frame is drawn. Differencing is linear, so decay() scales the stored
+    differences directly and is only paid per redraw, not per frame.
+
+    Memory is fixed by the grid. configure() and accumulate() run on the
+    processing worker; clear(), decay() and density() may be called from the
+    GUI thread and share one lock with them.
+    """
+
+    def __init__(self):
+        self.grid = None
+        self.frames = 0
+        self._diff = None
+        self._columns = (None, None)
+        self._resample = (None, None, None)
+        self._lock = threading.Lock()
+
+    def configure(self, grid):
+        """Switch to a new grid; the buffer is cleared if it actually changed."""
+        if grid == self.grid:
+            return
+        with self._lock:
+            self.grid = grid
+            if grid is None:
+                self._diff = None
+            else:
+                # One extra row holds the -1 that closes runs ending on the top row
+                self._diff = np.zeros((grid.width, grid.height + 1), dtype=np.float32)
+            self.frames = 0
+
+    def clear(self):
+        with self._lock:
+            if self._diff is not None:
+                self._diff[:] = 0
+            self.frames = 0
+
+    def _segmentColumns(self, n, width):
+        """Column of each of the n - 1 segments of an n-sample trace, cached."""
+        if self._columns[0] != (n, width):
+            self._columns = ((n, width), (np.arange(n - 1) * width) // n)
+        return self._columns[1]
+
+    def accumulate(self, y):
+        """Add one display trace to the density buffer."""
+        grid = self.grid
+        if grid is None or len(y) < 2:
+            return
+        width, height = grid.width, grid.height
+        n = len(y)
+        if n < width:
+            # Sparser than the pixel grid: resample so every column gets a segment
+            if self._resample[0] != (n, width):
+                self._resample = ((n, width), np.linspace(0, n - 1, width), np.arange(n))
+            _, at, xp = self._resample
+            y = np.interp(at, xp, y)
+            n = width
+
+        rows = np.floor((y - grid.y_min) * (height / (grid.y_max - grid.y_min)))
+        lo = np.minimum(rows[:-1], rows[1:])
+        hi = np.maximum(rows[:-1], rows[1:])
+        visible = (hi >= 0) & (lo < height)
+        base = self._segmentColumns(n, width)[visible] * (height + 1)
+        start = base + np.clip(lo[visible], 0, height - 1).astype(np.intp)
+        stop = base + np.clip(hi[visible], 0, height - 1).astype(np.intp) + 1
+
+        with self._lock:
+            flat = self._diff.reshape(-1)
+            # float32 increments: a Python float takes NumPy's slow casting path
+            np.add.at(flat, start, np.float32(1))
+            np.add.at(flat, stop, np.float32(-1))
+            self.frames += 1
+
+    def decay(self, factor):
+        """Scale the accumulated history, e.g. 0.5 ** (elapsed / half_life)."""
+        with self._lock:
+            if self._diff is not None and factor != 1.0:
+                self._diff *= factor
+
+    def density(self, out=None):
+        """(grid, hits per pixel) as one consistent snapshot, or (None, None) when off.
+
+        out is reused when it has the grid's (width, height) shape.
+        """
+        with self._lock:
+            grid = self.grid
+            if grid is None:
+                return None, None
+            if out is None or out.shape != (grid.width, grid.height):
+                out = np.empty((grid.width, grid.height), dtype=np.float32)
+            np.cumsum(self._diff[:, :grid.height], axis=1, out=out)
+        # Decayed differences can leave float rounding residue below zero
+        return grid, np.maximum(out, 0, out=out)
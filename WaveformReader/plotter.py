@@ -1,10 +1,18 @@
 import pyqtgraph as pg
 import math
 
+import numpy as np
+
+from persistence import PersistenceGrid
+from trigger import BAND_MODES
+
 
 class WaveformPlot(pg.PlotWidget):
     NUM_HORZ_DIVS = 8
     NUM_VERT_DIVS = 8
+    CHANNEL_COLORS = ['yellow', '#00E5FF', '#FF66CC', '#66FF66']
+    PERSISTENCE_COLORMAP = 'inferno'
+    MAX_PERSISTENCE_PIXELS = 4096  # per axis; caps the density buffer on very large screens
 
     def __init__(self, control):
         super().__init__(title="Waveform Display")
@@ -21,7 +29,21 @@ class WaveformPlot(pg.PlotWidget):
             ax.setPen(pg.mkPen(color='#aaa'))
             ax.setTextPen(pg.mkPen(color='#aaa'))
 
-        self.plot = self.plotItem.plot(pen=pg.mkPen('yellow', width=1.5))
+        self.plot = self.plotItem.plot(pen=pg.mkPen(self.CHANNEL_COLORS[0], width=1.5))
+        self.channels = [self.plot]
+        self._envelopes = {}  # channel index -> (lower curve, fill), created on first use
+        self._legend = None
+        self._view_key = None  # range, ticks and markers were last laid out for this state
+
+        # Persistence density, drawn under the live traces
+        self.persistence_image = pg.ImageItem()
+        self.persistence_image.setLookupTable(
+            pg.colormap.get(self.PERSISTENCE_COLORMAP).getLookupTable(nPts=256)
+        )
+        self.persistence_image.setZValue(-100)
+        self.persistence_image.setVisible(False)
+        self.plotItem.addItem(self.persistence_image)
+        self._persistence_pixels = None
 
         # Trigger level indicator
         self.trigger_line = pg.InfiniteLine(
@@ -32,6 +54,15 @@ class WaveformPlot(pg.PlotWidget):
         self.trigger_line.setVisible(False)
         self.plotItem.addItem(self.trigger_line)
 
+        # Second threshold of runt and window triggers
+        self.trigger_line2 = pg.InfiniteLine(
+            pos=0, angle=0,
+            pen=pg.mkPen(color='#FF8844', width=1, style=pg.QtCore.Qt.DashLine),
+            movable=False,
+        )
+        self.trigger_line2.setVisible(False)
+        self.plotItem.addItem(self.trigger_line2)
+
         self.trigger_arrow = pg.ArrowItem(
             angle=0, tipAngle=30, headLen=10, tailLen=0, tailWidth=0,
             pen=pg.mkPen('#FF4444', width=1), brush=pg.mkBrush('#FF4444'),
@@ -73,6 +104,83 @@ class WaveformPlot(pg.PlotWidget):
             event.accept()
         return handler
 
+    # ── Channels ─────────────────────────────────────────────────────────
+
+    def addChannel(self, name, primary_name=None):
+        """Add an overlaid curve for another probe. Returns its channel index."""
+        if self._legend is None:
+            self._legend = self.plotItem.addLegend(offset=(-10, 10))
+            if primary_name is not None:
+                self._legend.addItem(self.plot, primary_name)
+        color = self.CHANNEL_COLORS[len(self.channels) % len(self.CHANNEL_COLORS)]
+        curve = self.plotItem.plot(pen=pg.mkPen(color, width=1.5), name=name)
+        self.channels.append(curve)
+        return len(self.channels) - 1
+
+    def updateChannel(self, index, waveform):
+        """Set the data of an extra channel; axes and markers follow channel 0."""
+        self.channels[index].setData(waveform[0], waveform[1])
+
+    def updateEnvelope(self, index, x, lower):
+        """Show a channel's envelope as a filled band down to lower; None hides it."""
+        envelope = self._envelopes.get(index)
+        if lower is None:
+            if envelope is not None and envelope[0].isVisible():
+                envelope[0].setVisible(False)
+                envelope[1].setVisible(False)
+            return
+        if envelope is None:
+            color = self.CHANNEL_COLORS[index % len(self.CHANNEL_COLORS)]
+            curve = pg.PlotDataItem(pen=pg.mkPen(color, width=1))
+            fill_color = pg.mkColor(color)
+            fill_color.setAlpha(70)
+            fill = pg.FillBetweenItem(self.channels[index], curve, brush=pg.mkBrush(fill_color))
+            self.plotItem.addItem(curve)
+            self.plotItem.addItem(fill)
+            envelope = self._envelopes[index] = (curve, fill)
+        envelope[0].setData(x, lower)
+        envelope[0].setVisible(True)
+        envelope[1].setVisible(True)
+
+    # ── Persistence ──────────────────────────────────────────────────────
+
+    def pixelWidth(self, x_span):
+        """View box pixels covered by a trace spanning x_span seconds."""
+        vb = self.plotItem.vb
+        x0, x1 = vb.viewRange()[0]
+        return round(vb.width() * x_span / (x1 - x0)) if x1 > x0 else 0
+
+    def persistenceGrid(self, x_span):
+        """PersistenceGrid matching the view box's pixels for a trace spanning x_span seconds."""
+        vb = self.plotItem.vb
+        y0, y1 = vb.viewRange()[1]
+        width = self.pixelWidth(x_span)
+        height = round(vb.height())
+        if width < 2 or height < 2 or y1 <= y0:
+            return None
+        return PersistenceGrid(
+            min(width, self.MAX_PERSISTENCE_PIXELS), min(height, self.MAX_PERSISTENCE_PIXELS),
+            round(y0, 9), round(y1, 9), x_span,
+        )
+
+    def updatePersistence(self, buffer):
+        """Draw the density of a PersistenceBuffer, log-scaled so rare hits stay visible."""
+        grid, pixels = buffer.density(out=self._persistence_pixels)
+        if grid is None:
+            return
+        self._persistence_pixels = pixels
+        np.log1p(pixels, out=pixels)
+        self.persistence_image.setImage(
+            pixels, autoLevels=False, levels=(0, max(float(pixels.max()), 1e-3)),
+        )
+        self.persistence_image.setRect(
+            pg.QtCore.QRectF(0, grid.y_min, grid.x_span, grid.y_max - grid.y_min)
+        )
+        self.persistence_image.setVisible(True)
+
+    def hidePersistence(self):
+        self.persistence_image.setVisible(False)
+
     # ── Tick / range helpers ─────────────────────────────────────────────
 
     def setTicks(self, x_step, y_step, vOffset=0):
@@ -98,20 +206,35 @@ class WaveformPlot(pg.PlotWidget):
 
     # ── Main update ──────────────────────────────────────────────────────
 
+    def _viewKey(self, x):
+        """Every control value the range, ticks and markers depend on."""
+        c = self.control
+        trigger_mode = c.getTriggerMode()
+        return (
+            c.getHorizontalDiv(), c.getVerticalDiv(), c.getVertOffsetValue(),
+            trigger_mode,
+            c.getTriggerLevelVolts() if trigger_mode != 'off' else None,
+            c.getTriggerLevel2Volts() if trigger_mode in BAND_MODES else None,
+            c.getHorzOffset(),
+            float(x[-1]) if len(x) > 0 else None,
+        )
+
     def updateWaveform(self, waveform):
-        hDiv = self.control.getHorizontalDiv()
-        vDiv = self.control.getVerticalDiv()
-        vOffset = self.control.getVertOffsetValue()
+        """Set channel 0's data; axes and markers are only laid out again when the controls moved."""
+        key = self._viewKey(waveform[0])
+        if key != self._view_key:
+            self._view_key = key
+            self._layoutView(*key)
+        self.plot.setData(waveform[0], waveform[1])
 
+    def _layoutView(self, hDiv, vDiv, vOffset, trigger_mode, lvl, lvl2, h_offset, x_max):
         self.setPlotRange(vDiv, hDiv, vOffset)
         self.setTicks(hDiv, vDiv, vOffset)
 
-        trigger_mode = self.control.getTriggerMode()
         trigger_on = trigger_mode != 'off'
 
         # Trigger level indicator
         if trigger_on:
-            lvl = self.control.getTriggerLevelVolts()
             self.trigger_line.setValue(lvl)
             self.trigger_line.setVisible(True)
             self.trigger_arrow.setPos(0, lvl)
@@ -120,10 +243,16 @@ class WaveformPlot(pg.PlotWidget):
             self.trigger_line.setVisible(False)
             self.trigger_arrow.setVisible(False)
 
+        if trigger_mode in BAND_MODES:
+            self.trigger_line2.setValue(lvl2)
+            self.trigger_line2.setVisible(True)
+        else:
+            self.trigger_line2.setVisible(False)
+
         # Horizontal offset marker
-        h_offset = self.control.getHorzOffset()
         if h_offset != 0 and trigger_on:
-            x_max = waveform[0][-1] if len(waveform[0]) > 0 else self.NUM_HORZ_DIVS * hDiv
+            if x_max is None:
+                x_max = self.NUM_HORZ_DIVS * hDiv
             trigger_x = x_max * (500 + h_offset) / 1000.0
             self.horz_offset_line.setValue(trigger_x)
             self.horz_offset_line.setVisible(True)
@@ -133,5 +262,3 @@ class WaveformPlot(pg.PlotWidget):
         else:
             self.horz_offset_line.setVisible(False)
             self.horz_offset_arrow.setVisible(False)
-
-        self.plot.setData(waveform[0], waveform[1])
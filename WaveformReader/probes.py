@@ -0,0 +1,15 @@
+import numpy as np
+
+
+class ProbeChannel:
+    """One probe's reader, calibration and most recent processed record and display trace."""
+
+    def __init__(self, name, reader, calibration, display_size):
+        self.name = name
+        self.reader = reader
+        self.calibration = calibration
+        self.y_record = np.zeros(display_size)  # full-resolution triggered record
+        self.y_display = self.y_record          # y_record decimated for drawing
+        self.y_lower = None    # lower bound of y_display in envelope mode
+        self.timestamp = None  # host receive time of the frame behind y_display
+        self.prev_connected = False
@@ -0,0 +1,322 @@
+import collections
+import threading
+import time
+import traceback
+
+import numpy as np
+from PyQt5.QtCore import QThread, pyqtSignal
+
+from acquisition import HIRES_MAX_WINDOW, FrameAverager, boxcarMean
+from decimation import MinMaxDecimator
+from filters import SlidingMedian
+from frameDelivery import LatestFrameMailbox
+from measurement import MeasurementManager, MeasurementStatistics
+from persistence import PersistenceBuffer
+from spectrum import SpectrumAnalyzer
+from trigger import applyTrigger
+
+STOP_TIMEOUT_MS = 2000  # how long stop() waits for the thread to finish
+
+# Everything the worker needs from the GUI to process one frame. Immutable and
+# replaced as a whole, so a frame is never processed with half-applied settings.
+ProcessingSettings = collections.namedtuple('ProcessingSettings', [
+    'mode',                # ControlPanel mode; the worker idles in "Stop"
+    'gain',                # VGA gain multiplier
+    'offset_steps',        # committed vertical offset, DAC steps
+    'median_size',         # sliding median window, samples (1 = off)
+    'acquisition',         # acquisition.ACQUISITION_MODES entry
+    'average_count',       # frames combined by the average modes, or hi-res boxcar samples
+    'trigger',             # trigger.TriggerSpec
+    'h_offset',            # samples
+    'x_span',              # seconds across the display, for time-based measurements
+    'display_width',       # plot pixels across the trace; longer records are decimated to 2x this
+    'settle_until',        # time.monotonic() before which frames are discarded
+    'persistence',         # persistence.PersistenceGrid, or None when persistence is off
+    'spectrum',            # spectrum.SpectrumSettings, or None when the spectrum pane is off
+    'measurements',        # names of the measurements on display; only these are computed
+])
+
+# One worker pass: per-channel display traces (None where no new frame arrived),
+# their receive timestamps, the primary channel's measurements (or None),
+# per-channel lower traces in envelope mode (None otherwise; traces are the
+# upper), the primary channel's spectrum.Spectrum (or None), a copy of the
+# running MeasurementStatistics, and the full-resolution triggered records.
+# traces and envelopes are min/max decimated to the display width for drawing;
+# they are the records themselves when those are short enough.
+ProcessedFrames = collections.namedtuple('ProcessedFrames', [
+    'traces', 'timestamps', 'measurements', 'envelopes', 'spectrum', 'statistics', 'records',
+])
+
+
+class ProcessingWorker(QThread):
+    """Turns raw probe frames into display traces and measurements off the GUI thread.
+
+    The GUI publishes a ProcessingSettings snapshot with setSettings() and
+    reads results, a latest-result mailbox, when frameReady fires; it only
+    has to draw and update labels. Between frames the worker blocks: live
+    readers wake it from their frame delivery's on_put, and a replay reader
+    is waited on until its next frame is due.
+    """
+
+    # Emitted after each result is put in the mailbox; queued to the GUI thread
+    frameReady = pyqtSignal()
+
+    def __init__(self, channels, frame_size, display_size, history=None):
+        """history: optional history.FrameHistory that keeps the primary channel's raw frames."""
+        super().__init__()
+        self.channels = channels
+        self.frame_size = frame_size
+        self.display_size = display_size
+        self.results = LatestFrameMailbox()
+        self.measurements = MeasurementManager()
+        self.statistics = MeasurementStatistics()
+        self._active_measurements = ()
+        self.median = SlidingMedian(1)
+        self.persistence = PersistenceBuffer()
+        self.averagers = [FrameAverager() for _ in channels]
+        self.spectrum = SpectrumAnalyzer()
+        self.decimator = MinMaxDecimator()
+        self.history = history
+        # Used by processHistoryFrame() on the GUI thread, so never shared with run()
+        self._history_median = SlidingMedian(1)
+        self._history_measurements = MeasurementManager()
+        self._history_decimator = MinMaxDecimator()
+        self._x = (None, None)
+        self.profiler = None
+        self._settings = None
+        self._average_key = None
+        self._wake = threading.Event()
+        self._running = True
+        self._paused = False
+        self.errors = 0
+        self._last_error = None
+        for ch in channels:
+            frames = getattr(ch.reader, 'frames', None)
+            if frames is not None:
+                frames.on_put = self._wake.set
+
+    def setSettings(self, settings):
+        """Replace the settings snapshot; frames from now on are processed with it."""
+        self._settings = settings
+        self._wake.set()
+
+    def setPaused(self, paused):
+        """Park the worker (leaving frames in the readers) or resume it, e.g. while the GUI sleeps."""
+        self._paused = paused
+        self._wake.set()
+
+    def stop(self):
+        self._running = False
+        self._wake.set()
+        if not self.wait(STOP_TIMEOUT_MS):
+            print("Processing worker did not stop in time")
+
+    def _reportError(self):
+        """Count a failed pass and print its traceback, once per distinct error."""
+        self.errors += 1
+        error = traceback.format_exc()
+        if error != self._last_error:
+            self._last_error = error
+            print(f"Processing error, frame skipped:\n{error}", end='')
+
+    def _idleTimeout(self):
+        """Seconds until a paced (replay) reader has a frame due, or None to wait for a wake."""
+        timeout = None
+        for ch in self.channels:
+            until_next = getattr(ch.reader, 'secondsUntilNextFrame', None)
+            if until_next is None:
+                continue
+            delay = until_next()
+            if delay is not None and (timeout is None or delay < timeout):
+                timeout = delay
+        return timeout
+
+    def run(self):
+        while self._running:
+            settings = self._settings
+            if self._paused or settings is None or settings.mode == "Stop":
+                # Leave frames in the readers; nothing to do until the settings change
+                self._wake.wait()
+                self._wake.clear()
+                continue
+            try:
+                result = self.processOnce(settings)
+            except Exception:
+                # A bad frame or setting must not end the thread and freeze the display
+                self._reportError()
+                result = None
+            if result is None:
+                # A frame that arrives after processOnce() looked has already set _wake
+                self._wake.wait(self._idleTimeout())
+                self._wake.clear()
+            else:
+                self._last_error = None
+                self.results.put(result)
+                self.frameReady.emit()
+
+    def processOnce(self, settings):
+        """Process the newest frame of every channel. Returns None if none had one."""
+        settling = time.monotonic() < settings.settle_until
+        # Frames acquired under different control settings must not be combined
+        average_key = settings._replace(
+            mode=None, settle_until=None, persistence=None, spectrum=None, measurements=None,
+            display_width=None,
+        )
+        if average_key != self._average_key:
+            self._average_key = average_key
+            for averager in self.averagers:
+                averager.reset()
+            self.spectrum.reset()
+            self.statistics.reset()
+        if settings.measurements != self._active_measurements:
+            # A measurement that was off while frames went by starts from scratch
+            added = set(settings.measurements) - set(self._active_measurements)
+            self.statistics.reset(added)
+            self._active_measurements = settings.measurements
+
+        records = [None] * len(self.channels)
+        traces = [None] * len(self.channels)
+        timestamps = [None] * len(self.channels)
+        envelopes = [None] * len(self.channels)
+        spectrum = None
+        for i, ch in enumerate(self.channels):
+            frame = self._processChannel(ch, self.averagers[i], settings, settling)
+            if frame is not None:
+                traces[i], timestamps[i], envelopes[i], records[i] = frame[:4]
+                if i == 0:
+                    spectrum = frame[4]
+        if all(trace is None for trace in traces):
+            return None
+
+        # Every processed frame goes into the persistence buffer, including the
+        # ones the GUI never draws because a newer result replaced them
+        self.persistence.configure(settings.persistence)
+        if traces[0] is not None and settings.persistence is not None:
+            self.persistence.accumulate(traces[0])
+
+        measurements = None
+        if traces[0] is not None:
+            profiler = self.profiler
+            if profiler is not None:
+                t = profiler.start()
+            # Measured on the full-resolution record, not the decimated trace
+            self.measurements.updateData(self._recordX(settings.x_span), records[0])
+            measurements = self.measurements.getMeasurements(settings.measurements)
+            self.statistics.update(measurements)
+            if profiler is not None:
+                profiler.lap('measurements', t)
+        return ProcessedFrames(
+            traces, timestamps, measurements, envelopes, spectrum, self.statistics.copy(), records,
+        )
+
+    def _recordX(self, x_span):
+        """Sample times across a triggered record, cached per timebase; do not modify."""
+        if self._x[0] != x_span:
+            x = np.linspace(0, x_span, self.display_size)
+            x.flags.writeable = False
+            self._x = (x_span, x)
+        return self._x[1]
+
+    def _processChannel(self, ch, averager, settings, settling):
+        """Pull one channel's newest frame and process it.
+
+        Returns (trace, timestamp, lower, record, spectrum) or None, trace and
+        lower being decimated for display; spectrum is only computed for the
+        primary channel.
+        """
+        new_y = ch.reader.getLatestSamples()
+        if new_y is None:
+            return None
+        if len(new_y) != self.frame_size or settling:
+            ch.reader.releaseSamples(new_y)
+            return None
+
+        # Replayed frames carry the gain/offset they were captured with
+        frame_settings = getattr(ch.reader, 'frameSettings', None)
+        if frame_settings is not None:
+            recorded = frame_settings(new_y)
+            gain, offset_steps = recorded['gain'], recorded['offset_steps']
+        else:
+            gain, offset_steps = settings.gain, settings.offset_steps
+
+        profiler = self.profiler
+        if profiler is not None:
+            t = profiler.start()
+        try:
+            timestamp = ch.reader.frameTimestamp(new_y)
+            if self.history is not None and ch is self.channels[0]:
+                self.history.append(new_y, timestamp, gain, offset_steps, ch.reader.DECODE_TABLE)
+
+            # Steps 1-2: ADC decode, offset DAC subtraction and VGA inversion, fused into
+            # one table lookup that also copies the frame out of the reader's buffer
+            y = ch.calibration.applyCodes(new_y, ch.reader.DECODE_TABLE, gain, offset_steps)
+        finally:
+            # Returned to the reader's pool even if the frame cannot be processed
+            ch.reader.releaseSamples(new_y)
+        if profiler is not None:
+            if timestamp is not None:
+                profiler.record('queue_wait', time.monotonic() - timestamp)
+            t = profiler.lap('calibrate', t)
+
+        # Step 3: Median filter (and hi-res boxcar)
+        self._filter(y, settings, self.median)
+        if profiler is not None:
+            t = profiler.lap('median_filter', t)
+
+        # Spectrum of the whole filtered frame, before the trigger crops it
+        spectrum = None
+        if settings.spectrum is not None and ch is self.channels[0]:
+            self.spectrum.configure(settings.spectrum, len(y))
+            spectrum = self.spectrum.add(y)
+            if profiler is not None:
+                t = profiler.lap('spectrum', t)
+
+        # Step 4: Software trigger (frame_size → display_size points)
+        y = applyTrigger(y, self.display_size, settings.trigger, settings.h_offset)
+        if profiler is not None:
+            t = profiler.lap('trigger', t)
+
+        # Step 5: Combine with earlier triggered frames (average / envelope modes)
+        averager.configure(settings.acquisition, settings.average_count, len(y))
+        y, lower = averager.add(y)
+        if profiler is not None:
+            t = profiler.lap('average', t)
+
+        # Step 6: Min/max decimation to the display width, so draw cost stays
+        # fixed however deep the record is
+        trace = self.decimator.decimate(y, settings.display_width)
+        if lower is not None:
+            lower = self.decimator.decimate(lower, settings.display_width)
+        if profiler is not None:
+            profiler.lap('decimate', t)
+        return trace, timestamp, lower, y, spectrum
+
+    @staticmethod
+    def _filter(y, settings, median):
+        """Median filter y in place, then boxcar-average it in hi-res mode."""
+        median.size = settings.median_size
+        median(y, out=y)
+        # Hi-res: boxcar-average adjacent samples for extra vertical resolution
+        if settings.acquisition == 'hires':
+            boxcarMean(y, min(settings.average_count, HIRES_MAX_WINDOW), out=y)
+
+    def processHistoryFrame(self, age, settings):
+        """Re-run calibration, filtering, trigger and measurements on a past primary frame.
+
+        age counts back from the newest frame in history. Runs on the calling
+        thread with the frame's recorded gain and offset and the current
+        filter and trigger settings; frame averaging is not applied. Returns
+        (trace, record, timestamp, measurements), trace being the record
+        decimated for display.
+        """
+        codes, timestamp, gain, offset_steps = self.history.frame(age)
+        ch = self.channels[0]
+        y = ch.calibration.applyCodes(codes, self.history.decode_table, gain, offset_steps)
+        self._filter(y, settings, self._history_median)
+        y = applyTrigger(y, self.display_size, settings.trigger, settings.h_offset)
+        x = np.linspace(0, settings.x_span, self.display_size)
+        self._history_measurements.updateData(x, y)
+        return (
+            self._history_decimator.decimate(y, settings.display_width), y, timestamp,
+            self._history_measurements.getMeasurements(settings.measurements),
+        )
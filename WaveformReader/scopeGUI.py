@@ -1,6 +1,6 @@
 from PyQt5.QtWidgets import (
     QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QLabel,
-    QPushButton, QCheckBox, QApplication, QComboBox,
+    QPushButton, QCheckBox, QApplication, QComboBox, QSpinBox, QSlider,
 )
 from PyQt5.QtCore import QTimer, Qt, QEvent, QPoint
 from PyQt5.QtGui import QIcon, QPixmap, QCursor
@@ -14,10 +14,18 @@ from plotter import WaveformPlot
 from controls import ControlPanel
 from measurement import MeasurementManager, MeasurementPanel
 from tcpWaveformReader import TCPWaveformReader, WIFI_OPTIONS
+from frameDelivery import DELIVERY_LATEST
+from calibration import ProbeCalibration
+from probes import ProbeChannel
+from capture import CaptureWriter
+from processing import ProcessingWorker, ProcessingSettings
+from acquisition import HIRES_MAX_WINDOW, MAX_AVERAGE_COUNT
+from history import FrameHistory
+from spectrum import SpectrumPanel
+from instrumentation import PipelineProfiler
 
 import numpy as np
 import time
-from scipy.ndimage import median_filter
 
 RESIZE_BORDER = 6
 
@@ -128,17 +136,50 @@ class scopeGUI(QMainWindow):
         10: (0.583947,  -0.00406364),
     }
 
+    # Per-probe calibration by SSID; probes not listed use the constants above
+    PROBE_CALIBRATION = {}
+
     NOMINAL_HORZ_DIVS = 10
     TIMEBASE_CAL = 5.0 / 5.849
     SETTLE_DURATION = 0.5
     INACTIVITY_TIMEOUT_MS = 300_000
-
-    def __init__(self, frame_size):
+    CAPTURE_DIR = "captures"
+    HISTORY_MEMORY_MB = 64  # raw frames kept for scroll-back in Stop mode
+    LABEL_REFRESH_MS = 100  # text labels change at a readable rate, not the draw rate
+    DEFAULT_REFRESH_HZ = 60  # draw rate cap when the screen does not report its own
+    # Persistence choices: (label, half-life in seconds); None is off, inf never fades
+    PERSISTENCE_OPTIONS = [
+        ("Persistence: Off", None),
+        ("Persistence: 0.5 s", 0.5),
+        ("Persistence: 1 s", 1.0),
+        ("Persistence: 2 s", 2.0),
+        ("Persistence: 5 s", 5.0),
+        ("Persistence: Infinite", float('inf')),
+    ]
+    PERSISTENCE_REFRESH = 0.05  # seconds between density redraws
+    ACQUISITION_OPTIONS = [
+        ("Normal", 'normal'),
+        ("Average", 'average'),
+        ("Exp. Average", 'exponential'),
+        ("Envelope", 'envelope'),
+        ("Hi-Res", 'hires'),
+    ]
+
+    def __init__(self, frame_size, reader=None, probes=(), history_mb=None, display_size=None):
+        """probes: extra (name, host, port) probes streamed and overlaid alongside the primary.
+
+        history_mb: memory for the Stop-mode frame history (default HISTORY_MEMORY_MB).
+        display_size: samples in the triggered record shown across the screen
+        (default half the frame); deep records are min/max decimated for drawing.
+        """
         super().__init__()
 
         self.FRAME_SIZE = frame_size
-        self.DISPLAY_SIZE = 1000
-        self.AVERAGING = True
+        self.DISPLAY_SIZE = display_size or frame_size // 2
+        if not 0 < self.DISPLAY_SIZE <= frame_size:
+            raise ValueError(f"Display size must be 1..{frame_size}, got {self.DISPLAY_SIZE}")
+        self.MEDIAN_FILTER = True
+        self.MEDIAN_SIZE = 4  # median window while filtering; unchecked turns the filter off
 
         self.setWindowTitle("PocketProbe")
         self.setGeometry(100, 100, 2000, 1400)
@@ -176,10 +217,14 @@ class scopeGUI(QMainWindow):
         plot_layout.setContentsMargins(0, 0, 0, 0)
         plot_layout.setSpacing(8)
 
-        self.control = ControlPanel()
+        self.control = ControlPanel(self.DISPLAY_SIZE)
         self.plot = WaveformPlot(control=self.control)
         plot_layout.addWidget(self.plot, stretch=1)
 
+        self.spectrum_panel = SpectrumPanel()
+        self.spectrum_panel.setVisible(False)
+        plot_layout.addWidget(self.spectrum_panel, stretch=1)
+
         lbl_style = (
             "color: #aaa; font-weight: bold; font-size: 12pt;"
             "background: transparent; border: none; padding: 0;"
@@ -217,12 +262,96 @@ class scopeGUI(QMainWindow):
         div_labels.addWidget(horz_box, stretch=1)
         plot_layout.addLayout(div_labels)
 
-        self.averaging_checkbox = QCheckBox("Averaging")
-        self.averaging_checkbox.setChecked(True)
-        self.averaging_checkbox.stateChanged.connect(
-            lambda state: setattr(self, 'AVERAGING', state == Qt.Checked)
+        # Stop-mode scroll-back through the frame history
+        self.history_slider = QSlider(Qt.Horizontal)
+        self.history_slider.setToolTip("Scroll back through recent frames (0 = newest)")
+        self.history_label = QLabel()
+        self.history_label.setStyleSheet(lbl_style)
+        self.history_label.setMinimumWidth(260)
+        history_row = QHBoxLayout()
+        history_row.setContentsMargins(0, 0, 0, 0)
+        history_row.addWidget(self.history_slider, stretch=1)
+        history_row.addWidget(self.history_label)
+        self.history_slider.setVisible(False)
+        self.history_label.setVisible(False)
+        self.history_slider.valueChanged.connect(lambda _: self._updateHistoryView())
+        plot_layout.addLayout(history_row)
+        self._history_key = None
+        self._prev_mode = None
+        self._x_display_div = None
+        self._x_display = {}  # point count -> time axis
+
+        self.skew_label = QLabel()
+        self.skew_label.setStyleSheet(lbl_style)
+        self.skew_label.setVisible(False)
+        plot_layout.addWidget(self.skew_label)
+
+        self.median_checkbox = QCheckBox("Median Filter")
+        self.median_checkbox.setChecked(True)
+        self.median_checkbox.stateChanged.connect(
+            lambda state: setattr(self, 'MEDIAN_FILTER', state == Qt.Checked)
+        )
+
+        self.median_spin = QSpinBox()
+        self.median_spin.setRange(1, 32)
+        self.median_spin.setValue(self.MEDIAN_SIZE)
+        self.median_spin.setPrefix("Median: ")
+        self.median_spin.setToolTip("Median filter window, in samples")
+        self.median_spin.valueChanged.connect(lambda v: setattr(self, 'MEDIAN_SIZE', v))
+
+        self.acquisition_combo = QComboBox()
+        self.acquisition_combo.addItems([label for label, _ in self.ACQUISITION_OPTIONS])
+        self.acquisition_combo.setToolTip("How successive triggered frames are combined")
+        self.acquisition_combo.currentIndexChanged.connect(self._onAcquisitionChanged)
+
+        self.average_spin = QSpinBox()
+        self.average_spin.setRange(2, MAX_AVERAGE_COUNT)
+        self.average_spin.setValue(16)
+        self.average_spin.setPrefix("N: ")
+        self.average_spin.setToolTip(
+            "Frames combined by the average modes; boxcar samples (up to "
+            f"{HIRES_MAX_WINDOW}) in Hi-Res"
+        )
+        self.average_spin.setVisible(False)
+        self.average_label = QLabel()
+        self.average_label.setStyleSheet(lbl_style)
+        self.average_label.setVisible(False)
+        self._prev_average_text = None
+
+        self.persistence_combo = QComboBox()
+        self.persistence_combo.addItems([label for label, _ in self.PERSISTENCE_OPTIONS])
+        self.persistence_combo.setToolTip(
+            "Accumulate every frame into an intensity-graded display; the time is the fade half-life"
         )
-        plot_layout.addWidget(self.averaging_checkbox)
+        self.persistence_combo.currentIndexChanged.connect(self._onPersistenceChanged)
+        self._persistence_drawn = 0.0
+
+        self.spectrum_checkbox = QCheckBox("Spectrum")
+        self.spectrum_checkbox.setChecked(False)
+        self.spectrum_checkbox.toggled.connect(self.spectrum_panel.setVisible)
+
+        self.record_btn = QPushButton("Record")
+        self.record_btn.setCheckable(True)
+        self.record_btn.toggled.connect(self._onRecordToggled)
+        self._recorder = None
+
+        self.stats_checkbox = QCheckBox("Pipeline Stats")
+        self.stats_checkbox.setChecked(False)
+        self.stats_checkbox.toggled.connect(self._onStatsToggled)
+        self.profiler = None
+
+        options_row = QHBoxLayout()
+        options_row.addWidget(self.median_checkbox)
+        options_row.addWidget(self.median_spin)
+        options_row.addWidget(self.acquisition_combo)
+        options_row.addWidget(self.average_spin)
+        options_row.addWidget(self.average_label)
+        options_row.addWidget(self.persistence_combo)
+        options_row.addWidget(self.spectrum_checkbox)
+        options_row.addWidget(self.stats_checkbox)
+        options_row.addStretch(1)
+        options_row.addWidget(self.record_btn)
+        plot_layout.addLayout(options_row)
 
         self.main_layout.addWidget(plot_area, stretch=6)
 
@@ -270,19 +399,67 @@ class scopeGUI(QMainWindow):
         self.main_layout.addWidget(right_panel, stretch=2)
 
         # --- Timers & state ---
-        self.waveform_reader = TCPWaveformReader(frame_size=self.FRAME_SIZE)
-        self._prev_y_display = np.zeros(self.DISPLAY_SIZE)
+        # Live view: always draw the newest frame, never a backlog
+        self.waveform_reader = reader or TCPWaveformReader(
+            frame_size=self.FRAME_SIZE, delivery=DELIVERY_LATEST
+        )
+        primary_name = self._ssid_combo.currentText()
+        self.channels = [ProbeChannel(
+            primary_name, self.waveform_reader,
+            self._calibrationFor(primary_name), self.DISPLAY_SIZE,
+        )]
+        for name, host, port in probes:
+            probe_reader = TCPWaveformReader(
+                frame_size=self.FRAME_SIZE, delivery=DELIVERY_LATEST, host=host, port=port
+            )
+            probe_reader.connect()
+            self.channels.append(ProbeChannel(
+                name, probe_reader, self._calibrationFor(name), self.DISPLAY_SIZE,
+            ))
+            self.plot.addChannel(name, primary_name=primary_name)
+        self.skew_label.setVisible(len(self.channels) > 1)
+        self.record_btn.setEnabled(hasattr(self.waveform_reader, 'recorder'))
+        self._prev_skew_text = None
         self._settle_time = 0.0
-        self._prev_connected = False
         self._is_sleeping = False
 
+        # Frame processing runs on its own thread; its frameReady signal drives drawing
+        history_bytes = (history_mb or self.HISTORY_MEMORY_MB) * 1024 * 1024
+        self.history = FrameHistory.fromBudget(history_bytes, self.FRAME_SIZE)
+        self.processor = ProcessingWorker(
+            self.channels, self.FRAME_SIZE, self.DISPLAY_SIZE, history=self.history
+        )
+        self._settings = None
+        self._measurement_results = None
+        self._publishSettings()
+        self.processor.start()
+
         self.control.onKnobChange(self.sendKnobPacket)
         self.control.autoscale_btn.clicked.connect(self._onAutoscale)
 
+        # Single-shot draw timer: frameReady starts it so that draws are coalesced
+        # to one per display refresh; nothing runs while no frames arrive
+        refresh_hz = QApplication.primaryScreen().refreshRate() or self.DEFAULT_REFRESH_HZ
+        self._draw_interval = 1.0 / refresh_hz
+        self._last_draw = 0.0
         self.timer = QTimer()
-        self.timer.setInterval(10)
+        self.timer.setSingleShot(True)
+        self.timer.setTimerType(Qt.PreciseTimer)
         self.timer.timeout.connect(self.updatePlot)
-        self.timer.start()
+        self.processor.frameReady.connect(self._onFrameReady)
+
+        # Controls are read after user input and on the label timer, not per frame
+        self._control_timer = QTimer()
+        self._control_timer.setSingleShot(True)
+        self._control_timer.setInterval(0)
+        self._control_timer.timeout.connect(self._pollControls)
+
+        self._prev_division_labels = None
+        self._label_timer = QTimer()
+        self._label_timer.setInterval(self.LABEL_REFRESH_MS)
+        self._label_timer.timeout.connect(self._pollControls)
+        self._label_timer.timeout.connect(self._refreshLabels)
+        self._label_timer.start()
 
         self._sync_timer = QTimer()
         self._sync_timer.setInterval(500)
@@ -305,7 +482,19 @@ class scopeGUI(QMainWindow):
         )
         self._sleep_overlay.setVisible(False)
 
+        self._stats_overlay = QLabel(self.plot)
+        self._stats_overlay.setStyleSheet(
+            "color: #e0e0e0; font-family: Consolas, monospace; font-size: 9pt;"
+            "background-color: rgba(0, 0, 0, 160); border-radius: 4px; padding: 6px;"
+        )
+        self._stats_overlay.move(70, 40)
+        self._stats_overlay.setVisible(False)
+        self._stats_timer = QTimer()
+        self._stats_timer.setInterval(1000)
+        self._stats_timer.timeout.connect(self._updateStatsOverlay)
+
         QApplication.instance().installEventFilter(self)
+        self._pollControls()
 
     # ── Connection ──────────────────────────────────────────────────────
 
@@ -317,6 +506,8 @@ class scopeGUI(QMainWindow):
         self._conn_btn.setEnabled(False)
         self._ssid_combo.setEnabled(False)
         self._setConnLabel("Connecting...", "#FFAA00")
+        self.channels[0].name = ssid
+        self.channels[0].calibration = self._calibrationFor(ssid)
         self.waveform_reader.connectWifi(ssid=ssid, password=password)
 
     def _onDisconnect(self):
@@ -359,13 +550,23 @@ class scopeGUI(QMainWindow):
 
     def _checkAndSyncSettings(self):
         self._updateConnStatus()
-        connected = self.waveform_reader.connected
-        if connected and not self._prev_connected:
-            print("Connected — syncing settings")
+        newly_connected = False
+        for ch in self.channels:
+            connected = ch.reader.connected
+            if connected and not ch.prev_connected:
+                print(f"{ch.name} connected — syncing settings")
+                newly_connected = True
+            ch.prev_connected = connected
+        if newly_connected:
             self.control.sendAllSettings()
             if self._is_sleeping:
                 self._wakeUp()
-        self._prev_connected = connected
+
+    def _calibrationFor(self, probe_name):
+        cal = self.PROBE_CALIBRATION.get(probe_name)
+        if cal is None:
+            cal = ProbeCalibration(self.OFFSET_CAL_POS, self.OFFSET_CAL_NEG, self.VGA_CAL)
+        return cal
 
     # ── Sleep / wake ────────────────────────────────────────────────────
 
@@ -376,6 +577,10 @@ class scopeGUI(QMainWindow):
             self._inactivity_timer.start()
             if self._is_sleeping:
                 self._wakeUp()
+        if etype in (QEvent.MouseButtonPress, QEvent.MouseButtonRelease,
+                     QEvent.KeyPress, QEvent.Wheel):
+            # Runs once the event has been delivered and the control has changed
+            self._control_timer.start()
         return super().eventFilter(obj, event)
 
     def _enterSleep(self):
@@ -383,6 +588,9 @@ class scopeGUI(QMainWindow):
             return
         self._is_sleeping = True
         print("Entering low power mode")
+        self.timer.stop()
+        self._label_timer.stop()
+        self.processor.setPaused(True)
         self.sendKnobPacket(self.control.OP_MAP['S'], 0)
         self._sleep_overlay.setVisible(True)
         self._sleep_overlay.raise_()
@@ -395,7 +603,10 @@ class scopeGUI(QMainWindow):
         print("Waking up")
         self.sendKnobPacket(self.control.OP_MAP['S'], 1)
         self._sleep_overlay.setVisible(False)
+        self.processor.setPaused(False)
         self.control.sendAllSettings()
+        self._label_timer.start()
+        self._onFrameReady()
 
     # ── Native Windows hit-testing (snap, edge-resize) ────────────────
 
@@ -500,6 +711,11 @@ class scopeGUI(QMainWindow):
                 self._title_bar.setVisible(True)
         super().changeEvent(event)
 
+    def closeEvent(self, event):
+        self._stopRecording()
+        self.processor.stop()
+        super().closeEvent(event)
+
     def resizeEvent(self, event):
         super().resizeEvent(event)
         if self._sleep_overlay.isVisible():
@@ -512,67 +728,353 @@ class scopeGUI(QMainWindow):
             pkt = pack('<H', op_code) + pack('<I', value)
             hex_bytes = ' '.join(f'{b:02X}' for b in pkt)
             print(f"Packet: {hex_bytes} | op={op_code} val={value}")
-            self.waveform_reader.sendPacket(pkt)
+            for ch in self.channels:
+                ch.reader.sendPacket(pkt)
             if op_code in (self.control.OP_MAP['O'], self.control.OP_MAP['V']):
                 self._settle_time = time.monotonic()
+                self._publishSettings()
         except Exception as e:
             print(f"Failed to send packet: {e}")
 
     # ── Main update loop ────────────────────────────────────────────────
 
-    def updatePlot(self):
-        vLabel, hLabel, vOffset, hOffset = self.control.getDivisionLabels()
-        self.vert_offset_label.setText(f"Vertical: {vOffset}")
-        self.vert_scale_label.setText(vLabel)
-        self.horz_offset_label.setText(f"Horizontal: {hOffset}")
-        self.horz_scale_label.setText(hLabel)
-
-        if self.control.getMode() == "Stop":
-            self.measurement_panel.updateDisplay()
-            self._updateBatteryIndicator()
+    def _processingSettings(self):
+        """Snapshot of every control the processing worker reads, taken on the GUI thread."""
+        c = self.control
+        x_span = self.NOMINAL_HORZ_DIVS * c.getHorizontalDiv() * self.TIMEBASE_CAL
+        return ProcessingSettings(
+            mode=c.getMode(),
+            gain=c.getVoltageMultiplier(),
+            offset_steps=c.getCommittedVertOffsetDacSteps(),
+            median_size=self.MEDIAN_SIZE if self.MEDIAN_FILTER else 1,
+            acquisition=self.ACQUISITION_OPTIONS[self.acquisition_combo.currentIndex()][1],
+            average_count=self.average_spin.value(),
+            trigger=c.getTriggerSpec(),
+            h_offset=c.getHorzOffsetSamples(),
+            x_span=x_span,
+            display_width=self.plot.pixelWidth(x_span),
+            settle_until=self._settle_time + self.SETTLE_DURATION,
+            persistence=self._persistenceGrid(),
+            spectrum=(
+                self.spectrum_panel.getSettings(c.getSampleRate())
+                if self.spectrum_checkbox.isChecked() else None
+            ),
+            measurements=tuple(self.measurement_panel.active_measurements),
+        )
+
+    def _publishSettings(self):
+        """Hand the worker a new settings snapshot if any control changed. Returns True if so."""
+        settings = self._processingSettings()
+        if settings == self._settings:
+            return False
+        self._settings = settings
+        self.processor.setSettings(settings)
+        return True
+
+    def _pollControls(self):
+        """Pick up control changes: publish settings, switch Run / Stop, redraw if needed."""
+        if self._recorder is not None:
+            self._recorder.settings = self._captureSettings()
+        changed = self._publishSettings()
+
+        mode = self.control.getMode()
+        if mode != self._prev_mode:
+            self._prev_mode = mode
+            self._showHistory(mode == "Stop")
+            if mode == "Stop":
+                self.timer.stop()
+            changed = True
+        if mode == "Stop":
+            self._updateHistoryView()
+        elif changed:
+            # Timebase or display changes must show even if no frames are arriving
+            self._onFrameReady()
+
+    def _onFrameReady(self):
+        """Schedule a draw of the worker's newest result, at most one per display refresh."""
+        if self._is_sleeping or self._prev_mode == "Stop" or self.timer.isActive():
             return
+        wait = self._last_draw + self._draw_interval - time.monotonic()
+        self.timer.start(max(0, int(wait * 1000)))
+
+    def updatePlot(self):
+        """Draw the newest processed frame of every channel."""
+        self._last_draw = time.monotonic()
+
+        result = self.processor.results.get()
+        if result is not None:
+            for ch, trace, record, timestamp, lower in zip(
+                self.channels, result.traces, result.records, result.timestamps, result.envelopes
+            ):
+                if trace is not None:
+                    ch.y_display = trace
+                    ch.y_record = record
+                    ch.y_lower = lower
+                    ch.timestamp = timestamp
+            if result.measurements is not None:
+                self._measurement_results = result.measurements
+                self.measurement_panel.setStatistics(result.statistics)
+
+        profiler = self.profiler
+        if profiler is not None:
+            t = profiler.start()
+        y_display = self.channels[0].y_display
+        self.plot.updateWaveform((self._xDisplay(len(y_display)), y_display))
+        for i in range(1, len(self.channels)):
+            y = self.channels[i].y_display
+            self.plot.updateChannel(i, (self._xDisplay(len(y)), y))
+        for i, ch in enumerate(self.channels):
+            if ch.y_lower is None:
+                self.plot.updateEnvelope(i, None, None)
+            else:
+                self.plot.updateEnvelope(i, self._xDisplay(len(ch.y_lower)), ch.y_lower)
+        if result is not None and result.spectrum is not None:
+            self.spectrum_panel.updateSpectrum(result.spectrum)
+        if profiler is not None:
+            profiler.lap('draw', t)
+            if result is not None:
+                profiler.count('drawn')
+                for ch, timestamp in zip(self.channels, result.timestamps):
+                    if timestamp is not None:
+                        profiler.record('frame_age', time.monotonic() - timestamp)
+        self._updatePersistence()
+        record = self.channels[0].y_record
+        self.measurements.updateData(
+            self._xDisplay(len(record)), record, self._measurement_results
+        )
 
+    def _refreshLabels(self):
+        """Text refresh on its own slower timer; each label is only set when its text changes."""
+        labels = self.control.getDivisionLabels()
+        if labels != self._prev_division_labels:
+            self._prev_division_labels = labels
+            vLabel, hLabel, vOffset, hOffset = labels
+            self.vert_offset_label.setText(f"Vertical: {vOffset}")
+            self.vert_scale_label.setText(vLabel)
+            self.horz_offset_label.setText(f"Horizontal: {hOffset}")
+            self.horz_scale_label.setText(hLabel)
+        self.measurement_panel.updateDisplay()
+        self._updateBatteryIndicator()
+        if self.control.getMode() != "Stop":
+            self._updateSkewLabel()
+            self._updateAverageLabel()
+
+    def _xDisplay(self, n):
+        """Time axis for n points across the display, cached per timebase; shared, do not modify.
+
+        n is DISPLAY_SIZE for full records and smaller for decimated traces.
+        """
         hDiv = self.control.getHorizontalDiv()
-        x_display = np.linspace(
-            0, self.NOMINAL_HORZ_DIVS * hDiv * self.TIMEBASE_CAL, self.DISPLAY_SIZE
+        if hDiv != self._x_display_div:
+            self._x_display_div = hDiv
+            self._x_display = {}
+        x = self._x_display.get(n)
+        if x is None:
+            x = np.linspace(0, self.NOMINAL_HORZ_DIVS * hDiv * self.TIMEBASE_CAL, n)
+            x.flags.writeable = False
+            self._x_display[n] = x
+        return x
+
+    # ── Stop-mode history ───────────────────────────────────────────────
+
+    def _showHistory(self, stopped):
+        """Show the history slider on entering Stop, parked on the newest frame."""
+        count = len(self.history)
+        visible = stopped and count > 0
+        if visible:
+            self.history_slider.setRange(-(count - 1), 0)
+            self.history_slider.setValue(0)
+            # The newest frame is already on screen; redraw only once something changes
+            self._history_key = (0, self._settings)
+            self._setHistoryLabel(0, count)
+        self.history_slider.setVisible(visible)
+        self.history_label.setVisible(visible)
+
+    def _updateHistoryView(self):
+        """Re-process and draw the selected history frame when it or the settings change."""
+        if self.history_slider.isHidden():
+            return
+        age = -self.history_slider.value()
+        key = (age, self._settings)
+        if key == self._history_key:
+            return
+        self._history_key = key
+        trace, record, timestamp, measurements = self.processor.processHistoryFrame(
+            age, self._settings
         )
+        ch = self.channels[0]
+        ch.y_display, ch.y_record, ch.y_lower, ch.timestamp = trace, record, None, timestamp
+        self._measurement_results = measurements
+
+        self.plot.updateWaveform((self._xDisplay(len(trace)), trace))
+        self.plot.updateEnvelope(0, None, None)
+        self.measurements.updateData(self._xDisplay(len(record)), record, measurements)
+        self._setHistoryLabel(age, len(self.history))
+
+    def _setHistoryLabel(self, age, count):
+        text = f"Frame {-age} of {count - 1}"
+        then, newest = self.history.timestamp(age), self.history.timestamp(0)
+        if then is not None and newest is not None:
+            text += f"  ({(then - newest) * 1e3:+.1f} ms)"
+        self.history_label.setText(text)
+
+    # ── Acquisition modes ───────────────────────────────────────────────
+
+    def _onAcquisitionChanged(self, index):
+        mode = self.ACQUISITION_OPTIONS[index][1]
+        self.average_spin.setVisible(mode != 'normal' and mode != 'envelope')
+        self.average_label.setVisible(mode in ('average', 'exponential', 'envelope'))
+        self._prev_average_text = None
+
+    def _updateAverageLabel(self):
+        """Frames combined so far on the primary channel, e.g. "37/128"."""
+        averager = self.processor.averagers[0]
+        if averager.mode == 'envelope':
+            text = f"{averager.count} frames"
+        elif averager.mode in ('average', 'exponential'):
+            text = f"{averager.count}/{averager.size}"
+        else:
+            return
+        if text != self._prev_average_text:
+            self._prev_average_text = text
+            self.average_label.setText(text)
 
-        new_y = self.waveform_reader.getLatestSamples()
-        settling = (time.monotonic() - self._settle_time) < self.SETTLE_DURATION
+    # ── Persistence ─────────────────────────────────────────────────────
 
-        if new_y is not None and len(new_y) == self.FRAME_SIZE and not settling:
-            y_display = np.array(new_y)
+    def _persistenceHalfLife(self):
+        return self.PERSISTENCE_OPTIONS[self.persistence_combo.currentIndex()][1]
 
-            voltage_gain = self.control.getVoltageMultiplier()
-            offset_steps = self.control.getCommittedVertOffsetDacSteps()
+    def _persistenceGrid(self):
+        if self._persistenceHalfLife() is None:
+            return None
+        return self.plot.persistenceGrid(
+            self.NOMINAL_HORZ_DIVS * self.control.getHorizontalDiv() * self.TIMEBASE_CAL
+        )
 
-            # Step 1: Subtract offset DAC contribution
-            if offset_steps > 0:
-                offset = self.OFFSET_CAL_POS[0] * offset_steps + self.OFFSET_CAL_POS[1]
-            elif offset_steps < 0:
-                offset = self.OFFSET_CAL_NEG[0] * offset_steps + self.OFFSET_CAL_NEG[1]
-            else:
-                offset = 0.0
-            y_display -= offset
+    def _onPersistenceChanged(self, index):
+        if self.PERSISTENCE_OPTIONS[index][1] is None:
+            self.plot.hidePersistence()
+        else:
+            self.processor.persistence.clear()
+            self._persistence_drawn = time.monotonic()
 
-            # Step 2: Invert per-VGA transfer function
-            m, c = self.VGA_CAL[voltage_gain]
-            y_display = (y_display - c) / m
+    def _updatePersistence(self):
+        """Fade and redraw the density image, at most every PERSISTENCE_REFRESH seconds."""
+        half_life = self._persistenceHalfLife()
+        if half_life is None:
+            return
+        now = time.monotonic()
+        elapsed = now - self._persistence_drawn
+        if elapsed < self.PERSISTENCE_REFRESH:
+            return
+        self._persistence_drawn = now
+        buffer = self.processor.persistence
+        buffer.decay(0.5 ** (elapsed / half_life))
+        self.plot.updatePersistence(buffer)
+
+    def _updateSkewLabel(self):
+        """Show each extra probe's receive-time offset from the primary probe."""
+        if len(self.channels) < 2:
+            return
+        ref = self.channels[0].timestamp
+        parts = []
+        for ch in self.channels[1:]:
+            if ref is None or ch.timestamp is None:
+                parts.append(f"{ch.name}: --")
+            else:
+                parts.append(f"{ch.name}: {(ch.timestamp - ref) * 1e3:+.1f} ms")
+        text = "Skew vs " + self.channels[0].name + " — " + ", ".join(parts)
+        if text != self._prev_skew_text:
+            self._prev_skew_text = text
+            self.skew_label.setText(text)
+
+    # ── Pipeline stats ──────────────────────────────────────────────────
+
+    def _onStatsToggled(self, checked):
+        self.profiler = PipelineProfiler() if checked else None
+        self.processor.profiler = self.profiler
+        for ch in self.channels:
+            if hasattr(ch.reader, 'profiler'):
+                ch.reader.profiler = self.profiler
+        self._stats_overlay.setVisible(checked)
+        if checked:
+            self.profiler.counters['dropped'] = self._droppedFrames()
+            self.profiler.rates()  # start the rate window now
+            self._stats_overlay.setText("Collecting...")
+            self._stats_overlay.adjustSize()
+            self._stats_overlay.raise_()
+            self._stats_timer.start()
+        else:
+            self._stats_timer.stop()
 
-            # Step 3: Median filter
-            y_display = median_filter(y_display, size=4 if self.AVERAGING else 2)
+    def _updateStatsOverlay(self):
+        profiler = self.profiler
+        if profiler is None:
+            return
+        profiler.counters['dropped'] = self._droppedFrames()
+        self._stats_overlay.setText(profiler.formatReport(profiler.rates()))
+        self._stats_overlay.adjustSize()
+
+    def _droppedFrames(self):
+        """Frames the delivery policies discarded: FIFO overflow or mailbox overwrites."""
+        return sum(
+            ch.reader.frames.dropped + getattr(ch.reader.frames, 'overwritten', 0)
+            for ch in self.channels if hasattr(ch.reader, 'frames')
+        )
 
-            # Step 4: Software trigger (2000 → 1000 points)
-            y_display = self._applyTrigger(y_display)
+    # ── Recording ───────────────────────────────────────────────────────
 
-            self._prev_y_display = y_display
+    def _onRecordToggled(self, checked):
+        if checked:
+            self._startRecording()
         else:
-            y_display = self._prev_y_display
+            self._stopRecording()
 
-        self.plot.updateWaveform((x_display, y_display))
-        self.measurements.updateData(x_display, y_display)
-        self.measurement_panel.updateDisplay()
-        self._updateBatteryIndicator()
+    def _startRecording(self):
+        os.makedirs(self.CAPTURE_DIR, exist_ok=True)
+        path = os.path.join(
+            self.CAPTURE_DIR, time.strftime("capture_%Y%m%d_%H%M%S.ppcap")
+        )
+        cal = self.channels[0].calibration
+        reader = self.waveform_reader
+        metadata = {
+            'source': reader.CAPTURE_SOURCE,
+            'probe': self.channels[0].name,
+            'vref': reader.VREF,
+            'offset_cal_pos': cal.offset_pos,
+            'offset_cal_neg': cal.offset_neg,
+            'vga_cal': {str(g): mc for g, mc in cal.vga.items()},
+            'timebase_cal': self.TIMEBASE_CAL,
+            'timebase_labels': self.control.timebase_labels,
+            'voltbase_labels': self.control.voltbase_labels,
+        }
+        self._recorder = CaptureWriter(
+            path, self.FRAME_SIZE, metadata=metadata, sample_dtype=reader.SAMPLE_DTYPE,
+        )
+        self._recorder.settings = self._captureSettings()
+        reader.recorder = self._recorder
+        self.record_btn.setText("Stop Recording")
+        print(f"Recording to {path}")
+
+    def _stopRecording(self):
+        recorder = self._recorder
+        if recorder is None:
+            return
+        self.waveform_reader.recorder = None
+        self._recorder = None
+        recorder.close()
+        self.record_btn.setText("Record")
+        print(f"Saved {recorder.frames_written} frames to {recorder.path}"
+              f" ({recorder.dropped} dropped)")
+
+    def _captureSettings(self):
+        return (
+            self.control.getVoltageMultiplier(),
+            self.control.vert_knob.value(),
+            self.control.horz_knob.value(),
+            self.control.getCommittedVertOffsetDacSteps(),
+            self.control.getHorzOffset(),
+        )
 
     # ── Battery ─────────────────────────────────────────────────────────
 
@@ -596,56 +1098,10 @@ class scopeGUI(QMainWindow):
                 "background-color: #3c3f41; border-radius: 4px;"
             )
 
-    # ── Software trigger ────────────────────────────────────────────────
-
-    def _applyTrigger(self, y_data):
-        """Extract DISPLAY_SIZE points from FRAME_SIZE-point buffer using trigger."""
-        n = len(y_data)
-        ds = self.DISPLAY_SIZE
-        base = ds // 2
-        h_offset = self.control.getHorzOffset()
-
-        def _defaultWindow():
-            mid = n // 2
-            start = max(0, min(n - ds, mid - base + h_offset))
-            return y_data[start:start + ds]
-
-        trigger_mode = self.control.getTriggerMode()
-        if trigger_mode == 'off':
-            return _defaultWindow()
-
-        pre = max(0, min(ds, base + h_offset))
-        post = ds - pre
-        search_start = pre
-        search_end = n - post
-
-        if search_start >= search_end:
-            return _defaultWindow()
-
-        region = y_data[search_start:search_end]
-        shifted = region - self.control.getTriggerLevelVolts()
-
-        if trigger_mode == 'rising':
-            crossings = np.where((shifted[:-1] < 0) & (shifted[1:] >= 0))[0]
-        elif trigger_mode == 'falling':
-            crossings = np.where((shifted[:-1] >= 0) & (shifted[1:] < 0))[0]
-        else:
-            return _defaultWindow()
-
-        if len(crossings) == 0:
-            return _defaultWindow()
-
-        idx = crossings[0] + search_start
-        result = y_data[idx - pre:idx + post]
-
-        if len(result) != ds:
-            return _defaultWindow()
-        return result
-
     # ── Autoscale ───────────────────────────────────────────────────────
 
     def _onAutoscale(self):
-        y = self._prev_y_display
+        y = self.channels[0].y_record
         if y is None or len(y) == 0:
             return
 
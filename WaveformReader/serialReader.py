@@ -1,61 +1,197 @@
 import serial
-import struct
 import threading
-import queue
+import time
+
+import numpy as np
+
+from framePool import FramePool
+from frameDelivery import DELIVERY_FIFO, makeDelivery
 
 # --- Configuration ---
 COM_PORT = 'COM3'
 BAUD_RATE = 115200
 BYTES_TO_READ = 2000  # 1000 samples * 2 bytes per uint16_t
+READ_AHEAD = 64 * 1024  # bytes requested per bulk read / driver RX buffer size
 
 GPIO_MASK = 0x0FFF  # 12-bit mask
 VREF = 5.3
+FRAME_MARKER = b'S'
 
 def convert(data):
     return ((float((data & GPIO_MASK) - 2048) / 4096) * (2 * VREF))
 
+
+# Every 12-bit code decoded once with convert(), so table lookups are bit-identical
+DECODE_TABLE = np.array([convert(code) for code in range(GPIO_MASK + 1)], dtype=np.float64)
+
+
+def decodeCodes(raw_bytes, out=None):
+    """Extract the 12-bit raw ADC codes from a little-endian uint16 frame buffer."""
+    return np.bitwise_and(np.frombuffer(raw_bytes, dtype='<u2'), GPIO_MASK, out=out)
+
+
+def convertFrame(raw_bytes, out=None, codes_out=None):
+    """Decode a little-endian uint16 frame buffer into an array of voltages."""
+    return np.take(DECODE_TABLE, decodeCodes(raw_bytes, out=codes_out), out=out)
+
+
 class SerialWaveformReader:
-    def __init__(self, frame_size, port='COM3', baud=115200, max_queue=60):
-        self.ser = serial.Serial(port, baud, timeout=None)
+    """Reads 'S'-prefixed frames of little-endian uint16 samples from a serial port.
+
+    port may be a device name or any pyserial URL (e.g. 'loop://'). Frames are
+    delivered as 12-bit raw ADC codes; DECODE_TABLE maps them to volts.
+    """
+
+    DECODE_TABLE = DECODE_TABLE
+    CAPTURE_SOURCE = 'serial'  # capture metadata; selects DECODE_TABLE on replay
+    SAMPLE_DTYPE = '<u2'       # wire format of a frame's samples
+    VREF = VREF
+
+    def __init__(self, frame_size, port=COM_PORT, baud=BAUD_RATE, max_queue=60,
+                 read_ahead=READ_AHEAD, delivery=DELIVERY_FIFO):
+        self.ser = serial.serial_for_url(port, baud, timeout=0.1)
+        if hasattr(self.ser, 'set_buffer_size'):
+            # Only supported on Windows; lets the driver absorb bursts at multi-Mbaud rates
+            self.ser.set_buffer_size(rx_size=max(read_ahead, 4096))
         self.frame_size = frame_size
-        self.queue = queue.Queue(maxsize=max_queue)
+        self.frame_bytes = frame_size * 2
+        self.read_ahead = read_ahead
+        self.pool = FramePool(frame_size, num_slots=max_queue + 2, dtype=np.uint16)
+        self.frames = makeDelivery(delivery, maxsize=max_queue, on_discard=self.pool.release)
+        self._buf = bytearray()
+        self._synced = False
+        self.frames_received = 0
+        self.resyncs = 0
+        self.recorder = None  # optional CaptureWriter with SAMPLE_DTYPE samples
         self._stop_event = threading.Event()
         self._thread = threading.Thread(target=self._readerThread, daemon=True)
         self._thread.start()
 
     def _readerThread(self):
         while not self._stop_event.is_set():
-            # Wait for start-of-frame marker 'S'
             try:
-                while True:
-                    marker = self.ser.read(1)
-                    if marker == b'S':
-                        break
-                    if self._stop_event.is_set():
-                        return
-                samples = []
-                for _ in range(self.frame_size):
-                    data = self.ser.read(2)
-                    sample = struct.unpack('<H', data)[0]
-                    samples.append(convert(sample))
-                    
-                if len(samples) == self.frame_size:
-                    try:
-                        self.queue.put(samples, timeout=0.1)
-                    except queue.Full:
-                        pass
-            except Exception:
-                pass
+                self._fill()
+                while self._parseFrame():
+                    pass
+            except serial.SerialException as e:
+                print(f"Serial error: {e}")
+                time.sleep(0.5)
+            except Exception as e:
+                print(f"Serial reader error: {e}")
+                self._buf.clear()
+                self._synced = False
+
+    def _fill(self):
+        """Bulk-read at least the rest of the current frame, or whatever is already waiting."""
+        needed = 1 + self.frame_bytes - len(self._buf)
+        waiting = min(self.ser.in_waiting, self.read_ahead)
+        data = self.ser.read(max(needed, waiting, 1))
+        if data:
+            self._buf += data
+
+    def _parseFrame(self):
+        """Consume one frame from the buffer if possible. Returns True if progress was made."""
+        buf = self._buf
+        frame_end = 1 + self.frame_bytes
+
+        if not buf:
+            return False
+        if buf[:1] != FRAME_MARKER:
+            # Lost sync: drop bytes up to the next marker candidate
+            idx = buf.find(FRAME_MARKER, 1)
+            self._synced = False
+            self.resyncs += 1
+            if idx < 0:
+                buf.clear()
+                return False
+            del buf[:idx]
+            return True
+
+        if len(buf) < frame_end:
+            return False
+
+        # After a resync the marker may be a sample byte that happens to be 'S', so
+        # wait for the following frame's marker to line up. When in sync, still check
+        # it whenever it has already arrived to catch truncated frames.
+        if len(buf) > frame_end:
+            if buf[frame_end:frame_end + 1] != FRAME_MARKER:
+                # A short frame misaligns every later marker; a damaged marker byte
+                # does not, so the marker after next tells the two apart
+                after = 2 * frame_end
+                if self._synced and len(buf) <= after:
+                    return False
+                if not self._synced or buf[after:after + 1] != FRAME_MARKER:
+                    del buf[:1]
+                    self._synced = False
+                    return True
+            else:
+                self._synced = True
+        elif not self._synced:
+            return False
+
+        self._queueFrame(buf, frame_end)
+        del buf[:frame_end]
+        return True
+
+    def _queueFrame(self, buf, frame_end):
+        recorder = self.recorder
+        if recorder is not None:
+            # append() copies the payload into its batch, so a view is enough
+            with memoryview(buf) as view:
+                recorder.append(view[1:frame_end], time.monotonic())
+        slot = self.pool.acquire()
+        if slot is None:
+            self.frames.dropped += 1
+            return
+        samples = self.pool.frame(slot)
+        with memoryview(buf) as view:
+            decodeCodes(view[1:frame_end], out=samples)
+        self.pool.timestamps[slot] = time.monotonic()
+        self.frames_received += 1
+        self.frames.put(samples)
 
     def getLatestSamples(self):
-        """Return the oldest frame in the queue, or None if none available."""
-        try:
-            return self.queue.get_nowait()
-        except queue.Empty:
-            return None
+        """Return the next frame under the delivery policy, or None if none available."""
+        return self.frames.get()
+
+    def releaseSamples(self, samples):
+        """Recycle a frame returned by getLatestSamples()."""
+        self.pool.release(samples)
+
+    def frameTimestamp(self, samples):
+        """Host receive time (time.monotonic) of a frame returned by getLatestSamples()."""
+        slot = self.pool.slotOf(samples)
+        return None if slot is None else float(self.pool.timestamps[slot])
+
+    # ── Live-reader API ──────────────────────────────────────────────────
+    # The serial link only streams frames: no WiFi, battery reports or
+    # control packets, so scopeGUI's knobs do not reach the probe.
+
+    battery_info = None
+    wifiConnecting = False
+    autoConnecting = False
+
+    @property
+    def connected(self):
+        return self.ser.is_open
+
+    def connect(self):
+        pass
+
+    def connectWifi(self, ssid=None, password=None):
+        pass
+
+    def userDisconnect(self):
+        pass
+
+    def getWifiResult(self):
+        return None
+
+    def sendPacket(self, pkt):
+        pass
 
     def close(self):
         self._stop_event.set()
         if self._thread.is_alive():
             self._thread.join(timeout=1)
-        self.ser.close()
\ No newline at end of file
+        self.ser.close()
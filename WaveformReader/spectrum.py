@@ -0,0 +1,243 @@
+import collections
+import functools
+
+import numpy as np
+import pyqtgraph as pg
+from PyQt5.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QComboBox, QSpinBox
+
+from acquisition import MAX_AVERAGE_COUNT, FrameAverager
+from decimation import MinMaxDecimator
+
+# Cosine-sum coefficients a0, a1, ...: w[i] = a0 - a1 cos(2πi/n) + a2 cos(4πi/n) - ...
+WINDOWS = {
+    'rectangular':     (1.0,),
+    'hann':            (0.5, 0.5),
+    'blackman-harris': (0.35875, 0.48829, 0.14128, 0.01168),
+    'flat-top':        (0.21557895, 0.41663158, 0.277263158, 0.083578947, 0.006947368),
+}
+SPECTRUM_MODES = ('normal', 'average', 'maxhold')
+AMPLITUDE_FLOOR = 1e-9  # volts; keeps log10 finite for empty bins (-180 dBV)
+
+# Everything the worker needs to compute spectra; None in ProcessingSettings when the pane is off
+SpectrumSettings = collections.namedtuple('SpectrumSettings', [
+    'window',        # WINDOWS key
+    'mode',          # SPECTRUM_MODES entry
+    'count',         # spectra averaged in 'average' mode
+    'sample_rate',   # Hz, from the timebase
+])
+
+# freqs is shared between results and must not be modified
+Spectrum = collections.namedtuple('Spectrum', ['freqs', 'amplitude'])
+
+
+@functools.lru_cache(maxsize=32)
+def window(name, n):
+    """Periodic (DFT-even) window of length n, computed once per (name, n) and read-only."""
+    phase = 2 * np.pi * np.arange(n) / n
+    w = np.zeros(n)
+    for k, a in enumerate(WINDOWS[name]):
+        w += (-1) ** k * a * np.cos(k * phase)
+    w.flags.writeable = False
+    return w
+
+
+class SpectrumAnalyzer:
+    """Single-sided amplitude spectra of successive frames, with averaging and max-hold.
+
+    Amplitudes are peak volts: a sine of amplitude A reads A at its bin
+    (exactly so with the flat-top window). Averaging is done on power
+    with an acquisition.FrameAverager ring, so the cost per spectrum does
+    not depend on the count; max-hold updates one preallocated array.
+    """
+
+    def __init__(self):
+        self.settings = None
+        self.n = 0
+        self.freqs = None
+        self._window = None
+        self._scale = 1.0
+        self._windowed = None
+        self._power = None
+        self._held = None
+        self._held_count = 0
+        self._averager = FrameAverager()
+
+    def configure(self, settings, n):
+        """Prepare for frames of n samples; anything but an unchanged call starts over."""
+        if settings == self.settings and n == self.n:
+            return
+        self.settings, self.n = settings, n
+        self._window = window(settings.window, n)
+        # Peak volts per bin: 2 / sum(w) for the one-sided spectrum
+        self._scale = 2.0 / self._window.sum()
+        self.freqs = np.fft.rfftfreq(n, 1.0 / settings.sample_rate)
+        self.freqs.flags.writeable = False
+        bins = len(self.freqs)
+        self._windowed = np.empty(n)
+        self._power = np.empty(bins)
+        self._held = np.empty(bins)
+        mode = 'average' if settings.mode == 'average' else 'normal'
+        self._averager.configure(mode, settings.count, bins)
+        self.reset()
+
+    def reset(self):
+        self._averager.reset()
+        self._held_count = 0
+
+    def add(self, y):
+        """Spectrum of one frame combined with the earlier ones. Returns a Spectrum."""
+        np.multiply(y, self._window, out=self._windowed)
+        spectrum = np.fft.rfft(self._windowed)
+        power = np.abs(spectrum, out=self._power)
+        power *= self._scale
+        # DC has no negative-frequency twin
+        power[0] *= 0.5
+        power *= power
+
+        mode = self.settings.mode
+        if mode == 'average':
+            power, _ = self._averager.add(power)
+        elif mode == 'maxhold':
+            if self._held_count == 0:
+                self._held[:] = power
+            else:
+                np.maximum(self._held, power, out=self._held)
+            self._held_count += 1
+            power = self._held
+        return Spectrum(self.freqs, np.sqrt(power))
+
+
+def findPeaks(amplitude, count, first_bin=1):
+    """Indices of the count highest local maxima from first_bin on, highest first.
+
+    Pass the window's main-lobe half width (its number of cosine terms) as
+    first_bin to keep the DC component's skirt from being reported as peaks.
+    """
+    a = amplitude
+    lo = max(first_bin, 1)
+    if len(a) - lo < 2:
+        return np.array([], dtype=np.intp)
+    mid = a[lo:-1]
+    peaks = np.flatnonzero((mid > a[lo - 1:-2]) & (mid >= a[lo + 1:])) + lo
+    if len(peaks) > count:
+        peaks = peaks[np.argpartition(a[peaks], -count)[-count:]]
+    return peaks[np.argsort(a[peaks])[::-1]]
+
+
+def _formatFrequency(hz):
+    if hz >= 1e6:
+        return f"{hz / 1e6:.3g} MHz"
+    if hz >= 1e3:
+        return f"{hz / 1e3:.3g} kHz"
+    return f"{hz:.3g} Hz"
+
+
+class SpectrumPanel(QWidget):
+    """Spectrum pane: window / scale / averaging controls above an amplitude plot with peak markers."""
+
+    WINDOW_OPTIONS = [
+        ("Hann", 'hann'),
+        ("Blackman-Harris", 'blackman-harris'),
+        ("Flat-top", 'flat-top'),
+        ("Rectangular", 'rectangular'),
+    ]
+    MODE_OPTIONS = [("Normal", 'normal'), ("Average", 'average'), ("Max Hold", 'maxhold')]
+    SCALE_OPTIONS = ["dBV", "Linear"]
+    NUM_MARKERS = 3
+    COMBO_STYLE = (
+        "QComboBox, QSpinBox { background-color: #3c3f41; color: #ccc; border: 1px solid #555;"
+        "border-radius: 4px; padding: 2px 6px; }"
+    )
+
+    def __init__(self):
+        super().__init__()
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.setSpacing(4)
+
+        controls = QHBoxLayout()
+        self.window_select = QComboBox()
+        self.window_select.addItems([label for label, _ in self.WINDOW_OPTIONS])
+        self.mode_select = QComboBox()
+        self.mode_select.addItems([label for label, _ in self.MODE_OPTIONS])
+        self.count_spin = QSpinBox()
+        self.count_spin.setRange(2, MAX_AVERAGE_COUNT)
+        self.count_spin.setValue(16)
+        self.count_spin.setPrefix("N: ")
+        self.count_spin.setEnabled(False)
+        self.mode_select.currentIndexChanged.connect(
+            lambda i: self.count_spin.setEnabled(self.MODE_OPTIONS[i][1] == 'average')
+        )
+        self.scale_select = QComboBox()
+        self.scale_select.addItems(self.SCALE_OPTIONS)
+        self.scale_select.currentIndexChanged.connect(self._onScaleChanged)
+        for w in (self.window_select, self.mode_select, self.count_spin, self.scale_select):
+            w.setStyleSheet(self.COMBO_STYLE)
+            controls.addWidget(w)
+        controls.addStretch(1)
+        layout.addLayout(controls)
+
+        self.plot = pg.PlotWidget(title="Spectrum")
+        self.plot.setBackground('#1e1e1e')
+        self.plot.plotItem.showGrid(x=True, y=True, alpha=0.3)
+        for axis in ('bottom', 'left'):
+            ax = self.plot.plotItem.getAxis(axis)
+            ax.setPen(pg.mkPen(color='#aaa'))
+            ax.setTextPen(pg.mkPen(color='#aaa'))
+        self.plot.plotItem.setLabel('bottom', units='Hz')
+        self.curve = self.plot.plotItem.plot(pen=pg.mkPen('#FFD54F', width=1))
+        self.markers = pg.ScatterPlotItem(
+            size=9, symbol='t', pen=pg.mkPen('#FF4444'), brush=pg.mkBrush('#FF4444'),
+        )
+        self.plot.plotItem.addItem(self.markers)
+        self.marker_labels = []
+        for _ in range(self.NUM_MARKERS):
+            label = pg.TextItem(color='#e0e0e0', anchor=(0.5, 1.2))
+            self.plot.plotItem.addItem(label)
+            self.marker_labels.append(label)
+        layout.addWidget(self.plot, stretch=1)
+        self._decimator = MinMaxDecimator()
+        self._onScaleChanged()
+
+    def getSettings(self, sample_rate):
+        return SpectrumSettings(
+            window=self.WINDOW_OPTIONS[self.window_select.currentIndex()][1],
+            mode=self.MODE_OPTIONS[self.mode_select.currentIndex()][1],
+            count=self.count_spin.value(),
+            sample_rate=sample_rate,
+        )
+
+    def _isDb(self):
+        return self.scale_select.currentIndex() == 0
+
+    def _onScaleChanged(self, *_):
+        if self._isDb():
+            self.plot.plotItem.setLabel('left', 'dBV', units='')
+        else:
+            self.plot.plotItem.setLabel('left', 'Amplitude', units='V')
+
+    def updateSpectrum(self, spectrum):
+        freqs, amplitude = spectrum
+        if self._isDb():
+            level = 20.0 * np.log10(np.maximum(amplitude, AMPLITUDE_FLOOR))
+        else:
+            level = amplitude
+        # Deep frames have far more bins than the plot has pixels
+        shown = self._decimator.decimate(level, round(self.plot.plotItem.vb.width()))
+        if shown is level:
+            self.curve.setData(freqs, level)
+        else:
+            self.curve.setData(np.linspace(freqs[0], freqs[-1], len(shown)), shown)
+
+        window_name = self.WINDOW_OPTIONS[self.window_select.currentIndex()][1]
+        peaks = findPeaks(amplitude, self.NUM_MARKERS, first_bin=len(WINDOWS[window_name]))
+        self.markers.setData(freqs[peaks], level[peaks])
+        unit = "dBV" if self._isDb() else "V"
+        for i, label in enumerate(self.marker_labels):
+            if i < len(peaks):
+                p = peaks[i]
+                label.setText(f"{_formatFrequency(freqs[p])}\n{level[p]:.3g} {unit}")
+                label.setPos(freqs[p], level[p])
+                label.setVisible(True)
+            else:
+                label.setVisible(False)
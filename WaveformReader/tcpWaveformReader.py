@@ -1,15 +1,19 @@
 import socket
 import struct
 import threading
-import queue
 import time
-import subprocess
-import os
+
+import numpy as np
+
+from framePool import FramePool
+from frameDelivery import DELIVERY_FIFO, makeDelivery
+from wifi import joinAccessPoint
 
 TCP_IP = '192.168.4.1'
 TCP_PORT = 8080
 GPIO_MASK = 0x0FFF  # 12-bit mask
 VREF = 1.5
+MAX_FRAME_SIZE = 0xFFFF // 2  # samples; messages carry a 16-bit byte-length prefix
 
 WIFI_OPTIONS = [
     ("PocketProbe", "starlight123"),
@@ -35,16 +39,58 @@ def convert(data):
     return (signed_val / 2048.0) * VREF
 
 
+# Every 12-bit code decoded once with convert(), so table lookups are bit-identical
+DECODE_TABLE = np.array([convert(code) for code in range(GPIO_MASK + 1)], dtype=np.float64)
+DECODE_TABLE_F32 = DECODE_TABLE.astype(np.float32)
+
+
+def decodeCodes(raw_bytes, out=None):
+    """Extract the 12-bit raw ADC codes from a big-endian uint16 frame buffer.
+
+    DECODE_TABLE[codes] gives normalized voltages; ProbeCalibration.applyCodes
+    goes straight to input volts.
+    """
+    return np.bitwise_and(np.frombuffer(raw_bytes, dtype='>u2'), GPIO_MASK, out=out)
+
+
+def convertFrame(raw_bytes, dtype=np.float64, out=None, codes_out=None):
+    """Decode a big-endian uint16 frame buffer into an array of normalized voltages.
+
+    Pass preallocated out/codes_out arrays to decode without allocating.
+    """
+    if out is not None:
+        dtype = out.dtype
+    table = DECODE_TABLE_F32 if np.dtype(dtype) == np.float32 else DECODE_TABLE
+    return np.take(table, decodeCodes(raw_bytes, out=codes_out), out=out)
+
+
 class TCPWaveformReader:
-    def __init__(self, frame_size, max_queue=10, retry_interval=1):
+    DECODE_TABLE = DECODE_TABLE  # raw code -> normalized volts for the frames delivered
+    CAPTURE_SOURCE = 'tcp'       # capture metadata; selects DECODE_TABLE on replay
+    SAMPLE_DTYPE = '>u2'         # wire format of a frame's samples
+    VREF = VREF
+
+    def __init__(self, frame_size, max_queue=10, retry_interval=1, delivery=DELIVERY_FIFO,
+                 host=TCP_IP, port=TCP_PORT):
+        if not 0 < frame_size <= MAX_FRAME_SIZE:
+            raise ValueError(f"TCP frames hold 1..{MAX_FRAME_SIZE} samples, got {frame_size}")
         self.frame_size = frame_size
-        self.queue = queue.Queue(maxsize=max_queue)
+        self.host = host
+        self.port = port
+        # Enough slots for a full queue, one frame held by the consumer and one being received
+        self.pool = FramePool(frame_size, num_slots=max_queue + 2, dtype=np.uint16)
+        self.frames = makeDelivery(delivery, maxsize=max_queue, on_discard=self.pool.release)
+        self._header = bytearray(2)
+        self._header_view = memoryview(self._header)
+        self._discard = memoryview(bytearray(frame_size * 2))
         self._stop_event = threading.Event()
         self.sock = None
         self._connected = False
         self._was_ever_connected = False
         self.retry_interval = retry_interval
         self.battery_info = None
+        self.recorder = None  # optional CaptureWriter fed from the reader thread
+        self.profiler = None  # optional PipelineProfiler; None costs nothing per frame
         self._wifi_connecting = False
         self._wifi_result = None  # (success: bool, message: str) or None
         self._wifi_ssid = WIFI_SSID
@@ -70,6 +116,11 @@ class TCPWaveformReader:
         t = threading.Thread(target=self._wifiConnectThread, daemon=True)
         t.start()
 
+    def connect(self):
+        """Start (or resume) TCP streaming without touching WiFi, e.g. on a routed network."""
+        self._tcp_retries = 0
+        self._user_disconnected = False
+
     def userDisconnect(self):
         """Disconnect and stop auto-reconnect until connectWifi is called again."""
         self._user_disconnected = True
@@ -98,85 +149,14 @@ class TCPWaveformReader:
 
     def _wifiConnectThread(self):
         try:
-            subprocess.run(
-                ["netsh", "wlan", "disconnect"],
-                capture_output=True, text=True, timeout=10
-            )
-            time.sleep(1)
-
-            self._ensureWifiProfile()
-
-            result = subprocess.run(
-                ["netsh", "wlan", "connect", f"name={self._wifi_ssid}",
-                 f"ssid={self._wifi_ssid}"],
-                capture_output=True, text=True, timeout=15
-            )
-            print(f"netsh connect stdout: {result.stdout.strip()}")
-            print(f"netsh connect stderr: {result.stderr.strip()}")
-
-            if "successfully" in result.stdout.lower():
-                time.sleep(2)
+            success, message = joinAccessPoint(self._wifi_ssid, self._wifi_password)
+            if success:
                 self._wifi_succeeded = True
                 self._user_disconnected = False
-                self._wifi_result = (True, "WiFi connected")
-            else:
-                self._wifi_result = (False, "WiFi failed — is device on?")
-        except subprocess.TimeoutExpired:
-            self._wifi_result = (False, "WiFi timed out")
-        except Exception as e:
-            self._wifi_result = (False, str(e))
+            self._wifi_result = (success, message)
         finally:
             self._wifi_connecting = False
 
-    def _ensureWifiProfile(self):
-        check = subprocess.run(
-            ["netsh", "wlan", "show", "profile", self._wifi_ssid],
-            capture_output=True, text=True, timeout=10
-        )
-        if self._wifi_ssid in check.stdout:
-            return
-
-        profile_xml = f"""<?xml version="1.0"?>
-<WLANProfile xmlns="http://www.microsoft.com/networking/WLAN/profile/v1">
-    <name>{self._wifi_ssid}</name>
-    <SSIDConfig><SSID><name>{self._wifi_ssid}</name></SSID></SSIDConfig>
-    <connectionType>ESS</connectionType>
-    <connectionMode>manual</connectionMode>
-    <MSM><security>
-        <authEncryption><authentication>WPA2PSK</authentication>
-            <encryption>AES</encryption><useOneX>false</useOneX></authEncryption>
-        <sharedKey><keyType>passPhrase</keyType>
-            <protected>false</protected><keyMaterial>{self._wifi_password}</keyMaterial></sharedKey>
-    </security></MSM>
-</WLANProfile>"""
-        tmp = os.path.join(os.environ.get("TEMP", "."), "esp_ap_profile.xml")
-        with open(tmp, "w") as f:
-            f.write(profile_xml)
-
-        result = subprocess.run(
-            ["netsh", "wlan", "add", "profile", f"filename={tmp}"],
-            capture_output=True, text=True, timeout=10
-        )
-        out = result.stdout.strip()
-        print(f"netsh add profile: {out}")
-
-        if "denied" in out.lower() or "used" not in out.lower():
-            print("Profile add may need admin — retrying elevated")
-            try:
-                import ctypes
-                ctypes.windll.shell32.ShellExecuteW(
-                    None, "runas", "netsh",
-                    f'wlan add profile filename="{tmp}"', None, 0
-                )
-                time.sleep(3)
-            except Exception as e:
-                print(f"Elevated profile add failed: {e}")
-
-        try:
-            os.remove(tmp)
-        except OSError:
-            pass
-
     MAX_TCP_RETRIES = 2
 
     def _connect(self):
@@ -193,7 +173,7 @@ class TCPWaveformReader:
             try:
                 sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
                 sock.settimeout(5)
-                sock.connect((TCP_IP, TCP_PORT))
+                sock.connect((self.host, self.port))
                 sock.settimeout(2)
                 self.sock = sock
                 self._connected = True
@@ -221,25 +201,14 @@ class TCPWaveformReader:
                 self._connect()
                 continue
             try:
-                header = self._recvExact(2)
-                if header is None or len(header) != 2:
+                if not self._recvInto(self._header_view):
                     self._disconnect()
                     continue
 
-                msg_len = struct.unpack('>H', header)[0]
+                msg_len = struct.unpack_from('>H', self._header)[0]
 
                 if msg_len == self.frame_size * 2:
-                    raw_bytes = self._recvExact(msg_len)
-                    if raw_bytes is not None and len(raw_bytes) == msg_len:
-                        samples = [
-                            convert(val)
-                            for val in struct.unpack('>' + 'H' * self.frame_size, raw_bytes)
-                        ]
-                        try:
-                            self.queue.put(samples, timeout=0.1)
-                        except queue.Full:
-                            pass
-                    else:
+                    if not self._readFrame():
                         self._disconnect()
 
                 elif msg_len == 2:
@@ -264,33 +233,87 @@ class TCPWaveformReader:
                 self._disconnect()
                 time.sleep(self.retry_interval)
 
+    def _readFrame(self):
+        """Receive one frame payload into a pool slot and queue it. Returns False on socket loss."""
+        slot = self.pool.acquire()
+        if slot is None:
+            # Consumer is holding every slot: keep the stream in sync and drop the frame
+            self.frames.dropped += 1
+            if not self._recvInto(self._discard):
+                return False
+            self._record(self._discard, time.monotonic())
+            return True
+
+        profiler = self.profiler
+        if profiler is not None:
+            t = profiler.start()
+        if not self._recvInto(self.pool.raw_views[slot]):
+            self.pool.release(slot)
+            return False
+
+        timestamp = time.monotonic()
+        if profiler is not None:
+            t = profiler.lap('recv', t)
+        self._record(self.pool.raw[slot], timestamp)
+        self.pool.timestamps[slot] = timestamp
+        samples = self.pool.frame(slot)
+        decodeCodes(self.pool.raw[slot], out=samples)
+        if profiler is not None:
+            profiler.lap('decode', t)
+            profiler.count('received')
+        self.frames.put(samples)
+        return True
+
+    def _record(self, raw, timestamp):
+        recorder = self.recorder
+        if recorder is not None:
+            recorder.append(raw, timestamp)
+
     MAX_RECV_TIMEOUTS = 2
 
-    def _recvExact(self, n):
-        buf = b''
+    def _recvInto(self, view):
+        """Fill a writable memoryview from the socket. Returns True once it is full."""
+        n = len(view)
+        got = 0
         timeouts = 0
-        while len(buf) < n and self._connected and self.sock:
+        while got < n and self._connected and self.sock:
             try:
-                chunk = self.sock.recv(n - len(buf))
-                if not chunk:
-                    return None
-                buf += chunk
+                count = self.sock.recv_into(view[got:], n - got)
+                if not count:
+                    return False
+                got += count
                 timeouts = 0
             except socket.timeout:
                 timeouts += 1
                 if timeouts >= self.MAX_RECV_TIMEOUTS:
-                    return None
+                    return False
                 continue
             except Exception:
-                return None
-        return buf if len(buf) == n else None
+                return False
+        return got == n
+
+    def _recvExact(self, n):
+        buf = bytearray(n)
+        return bytes(buf) if self._recvInto(memoryview(buf)) else None
 
     def getLatestSamples(self):
-        """Return the oldest frame in the queue, or None if none available."""
-        try:
-            return self.queue.get_nowait()
-        except queue.Empty:
-            return None
+        """Return the next frame under the delivery policy, or None if none available.
+
+        With 'latest' this is the newest frame; with 'fifo' the oldest queued one.
+        Frames hold 12-bit raw ADC codes (uint16): map them with DECODE_TABLE or
+        ProbeCalibration.applyCodes(). The frame is backed by a pool slot; hand it back with releaseSamples()
+        once it has been copied or processed.
+        """
+        return self.frames.get()
+
+    def releaseSamples(self, samples):
+        """Recycle a frame returned by getLatestSamples()."""
+        self.pool.release(samples)
+
+    def frameTimestamp(self, samples):
+        """Host receive time (time.monotonic) of a frame returned by getLatestSamples()."""
+        slot = self.pool.slotOf(samples)
+        return None if slot is None else float(self.pool.timestamps[slot])
 
     def sendPacket(self, pkt):
         if self._connected and self.sock:
@@ -0,0 +1,76 @@
+import numpy as np
+import pytest
+
+import serialReader
+import tcpWaveformReader
+from calibration import LUT_CACHE_SIZE, ProbeCalibration
+from scopeGUI import scopeGUI
+
+OFFSETS = (-85, -7, -1, 0, 1, 7, 85)
+
+
+def _calibration():
+    return ProbeCalibration(scopeGUI.OFFSET_CAL_POS, scopeGUI.OFFSET_CAL_NEG, scopeGUI.VGA_CAL)
+
+
+def _threeStep(volts, gain, offset_steps):
+    """The original per-frame path: decoded volts, offset DAC subtraction, VGA inversion."""
+    y = np.array(volts)
+    if offset_steps > 0:
+        offset = scopeGUI.OFFSET_CAL_POS[0] * offset_steps + scopeGUI.OFFSET_CAL_POS[1]
+    elif offset_steps < 0:
+        offset = scopeGUI.OFFSET_CAL_NEG[0] * offset_steps + scopeGUI.OFFSET_CAL_NEG[1]
+    else:
+        offset = 0.0
+    y -= offset
+    m, c = scopeGUI.VGA_CAL[gain]
+    return (y - c) / m
+
+
+READERS = [
+    (tcpWaveformReader, tcpWaveformReader.TCPWaveformReader.SAMPLE_DTYPE),
+    (serialReader, serialReader.SerialWaveformReader.SAMPLE_DTYPE),
+]
+
+
+@pytest.mark.parametrize("reader, sample_dtype", READERS, ids=["tcp", "serial"])
+@pytest.mark.parametrize("gain", sorted(scopeGUI.VGA_CAL))
+def test_lookup_matches_three_step_path(reader, sample_dtype, gain):
+    # Every 16-bit word, so every 12-bit code and the masked-off GPIO bits are covered
+    raw = np.arange(0x10000, dtype=np.uint16).astype(sample_dtype).tobytes()
+    codes = reader.decodeCodes(raw)
+    volts = reader.convertFrame(raw)
+    cal = _calibration()
+    for offset_steps in OFFSETS:
+        fused = cal.applyCodes(codes, reader.DECODE_TABLE, gain, offset_steps)
+        np.testing.assert_array_equal(fused, _threeStep(volts, gain, offset_steps))
+
+
+def test_lru_evicts_least_recently_used_table():
+    cal = _calibration()
+    gain = next(iter(scopeGUI.VGA_CAL))
+    table = tcpWaveformReader.DECODE_TABLE
+    first = cal.lookupTable(table, gain, 0)
+    for offset_steps in range(1, LUT_CACHE_SIZE):
+        cal.lookupTable(table, gain, offset_steps)
+    # Touching the oldest table makes offset 1 the next to go
+    assert cal.lookupTable(table, gain, 0) is first
+    cal.lookupTable(table, gain, LUT_CACHE_SIZE)
+    assert len(cal._tables) == LUT_CACHE_SIZE
+    assert cal.lookupTable(table, gain, 0) is first
+    evicted_key = (id(table), gain, 1)
+    assert evicted_key not in cal._tables
+
+    # An evicted setting is rebuilt and still matches the three-step path
+    codes = np.arange(4096, dtype=np.uint16)
+    np.testing.assert_array_equal(
+        cal.applyCodes(codes, table, gain, 1), _threeStep(table[codes], gain, 1),
+    )
+
+
+def test_set_constants_drops_cached_tables():
+    cal = _calibration()
+    gain = next(iter(scopeGUI.VGA_CAL))
+    before = cal.lookupTable(tcpWaveformReader.DECODE_TABLE, gain, 5)
+    cal.setConstants(cal.offset_pos, cal.offset_neg, cal.vga)
+    assert cal.lookupTable(tcpWaveformReader.DECODE_TABLE, gain, 5) is not before
@@ -0,0 +1,45 @@
+import types
+
+from frameDelivery import LatestFrameMailbox
+from processing import ProcessingSettings, ProcessingWorker
+
+RUN_SETTINGS = ProcessingSettings._make([None] * len(ProcessingSettings._fields))._replace(mode="Run")
+
+
+class _FailingPasses:
+    """Stands in for processOnce: raises for the first failures calls, then returns a result."""
+
+    def __init__(self, failures):
+        self.failures = failures
+        self.calls = 0
+
+    def __call__(self, settings):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise ValueError("bad trigger setting")
+        return "result"
+
+
+def test_worker_survives_a_failed_pass(capsys):
+    frames = LatestFrameMailbox()
+    channel = types.SimpleNamespace(reader=types.SimpleNamespace(frames=frames))
+    worker = ProcessingWorker([channel], frame_size=100, display_size=50)
+    worker.processOnce = _FailingPasses(failures=3)
+    worker.setSettings(RUN_SETTINGS)
+    worker.start()
+    try:
+        result = None
+        for _ in range(200):
+            frames.put(object())  # wakes the worker like a reader delivering a frame
+            result = worker.results.get()
+            if result is not None:
+                break
+            worker.wait(5)
+        assert result == "result"
+        assert worker.isRunning()
+        assert worker.errors == 3
+    finally:
+        worker.stop()
+    assert worker.isFinished()
+    # Repeats of the same error print one traceback
+    assert capsys.readouterr().out.count("ValueError: bad trigger setting") == 1
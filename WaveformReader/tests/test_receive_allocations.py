@@ -0,0 +1,9 @@
+import pytest
+
+from benchmark import benchReceiveAllocations
+
+
+@pytest.mark.parametrize("frame_size", [2000, 20000])
+def test_pooled_receive_does_not_allocate_per_frame(frame_size):
+    # Raises if a frame retains memory or the path makes a frame-sized copy
+    benchReceiveAllocations(frame_size, num_frames=500)
@@ -0,0 +1,71 @@
+import time
+
+import numpy as np
+import pytest
+
+from serialReader import FRAME_MARKER, SerialWaveformReader
+
+FRAME_SIZE = 100
+
+
+def _frame(frame_id, marker=FRAME_MARKER, payload_bytes=None):
+    """A wire frame whose samples all equal frame_id (no byte is the 'S' marker)."""
+    payload = np.full(FRAME_SIZE, frame_id, dtype='<u2').tobytes()
+    return marker + payload[:payload_bytes]
+
+
+def _send(reader, frames, paced):
+    """Write frames in one burst, or one at a time as a slow device would."""
+    if not paced:
+        reader.ser.write(b''.join(frames))
+        return
+    for frame in frames:
+        reader.ser.write(frame)
+        time.sleep(0.01)
+
+
+def _receive(reader, count, timeout=2.0):
+    """frame_id of every frame delivered until count arrive or timeout."""
+    ids = []
+    deadline = time.monotonic() + timeout
+    while len(ids) < count and time.monotonic() < deadline:
+        samples = reader.getLatestSamples()
+        if samples is None:
+            time.sleep(0.005)
+            continue
+        assert len(samples) == FRAME_SIZE
+        assert np.all(samples == samples[0])
+        ids.append(int(samples[0]))
+        reader.releaseSamples(samples)
+    return ids
+
+
+@pytest.fixture
+def reader():
+    # loop:// echoes every write back to the reader thread, like a device on a port
+    r = SerialWaveformReader(FRAME_SIZE, port='loop://')
+    yield r
+    r.close()
+
+
+def test_frames_decode_in_order(reader):
+    reader.ser.write(b''.join(_frame(i) for i in range(1, 7)))
+    assert _receive(reader, 6) == [1, 2, 3, 4, 5, 6]
+    assert reader.resyncs == 0
+
+
+@pytest.mark.parametrize("paced", [False, True])
+def test_bad_marker_loses_one_frame(reader, paced):
+    # After a resync the newest frame waits for one more marker, hence frame 7
+    frames = [_frame(i, marker=b'X' if i == 3 else FRAME_MARKER) for i in range(1, 8)]
+    _send(reader, frames, paced)
+    assert _receive(reader, 6) == [1, 2, 4, 5, 6, 7]
+    assert reader.resyncs > 0
+
+
+def test_truncated_frame_loses_one_frame(reader):
+    # In sync a frame is delivered once complete; a short one is only caught
+    # when the next frame's marker has already arrived, as in a steady stream
+    frames = [_frame(i, payload_bytes=FRAME_SIZE if i == 3 else None) for i in range(1, 7)]
+    _send(reader, frames, paced=False)
+    assert _receive(reader, 5) == [1, 2, 4, 5, 6]
@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+
+from trigger import _edgeTrigger, _edgeTriggers, applyTrigger, findTrigger, findTriggers
+
+DISPLAY_SIZE = 200
+
+
+def test_window_starts_at_sample_before_exact_level_crossing():
+    # The firing sample lies exactly on the level, so the crossing is a whole index
+    y = np.array([-1.0] * 600 + [0.0] + [1.0] * 1399)
+    assert findTrigger(y, 'rising') == 600
+    window = applyTrigger(y, DISPLAY_SIZE, 'rising', interpolate=False)
+    np.testing.assert_array_equal(window, y[599 - DISPLAY_SIZE // 2:599 + DISPLAY_SIZE // 2])
+    np.testing.assert_array_equal(window[DISPLAY_SIZE // 2:DISPLAY_SIZE // 2 + 2], [-1.0, 0.0])
+
+
+def test_interpolated_window_puts_crossing_at_centre():
+    y = np.array([-1.0] * 600 + [0.5] + [1.0] * 1399)
+    window = applyTrigger(y, DISPLAY_SIZE, 'rising')
+    assert len(window) == DISPLAY_SIZE
+    assert abs(window[DISPLAY_SIZE // 2]) < 1e-9
+
+
+@pytest.mark.parametrize("mode", ["rising", "falling"])
+@pytest.mark.parametrize("hysteresis", [0.0, 0.05])
+def test_batched_search_matches_single_frame(mode, hysteresis):
+    rng = np.random.default_rng(0)
+    t = np.arange(2000)
+    frames = [0.5 * np.sin(2 * np.pi * (t / 400 + rng.random())) + rng.normal(0, 0.02, len(t))
+              for _ in range(16)]
+    frames.append(np.full(len(t), 1.0))                                # never arms or fires
+    frames.append(np.array([-1.0] * 600 + [0.0] + [1.0] * 1399))       # fires exactly on the level
+    frames.append(np.array([1.0] * 600 + [0.0] + [-1.0] * 1399))
+    frames = np.stack(frames)
+
+    fire, crossings = _edgeTriggers(frames, mode, 0.0, hysteresis)
+    np.testing.assert_array_equal(crossings, findTriggers(frames, mode, 0.0, hysteresis))
+    for row, y in enumerate(frames):
+        found = _edgeTrigger(y, mode, 0.0, hysteresis)
+        if found is None:
+            assert fire[row] == -1 and np.isnan(crossings[row])
+        else:
+            assert fire[row] == found[0]
+            assert crossings[row] == found[1] == findTrigger(y, mode, 0.0, hysteresis)
@@ -0,0 +1,249 @@
+import collections
+
+import numpy as np
+
+EDGE_MODES = ('rising', 'falling')
+PULSE_MODES = ('pulse_lt', 'pulse_gt', 'pulse_range', 'glitch')
+BAND_MODES = ('runt', 'window_enter', 'window_exit')  # use both level and level2
+
+# Full trigger configuration. Widths are in samples; level2 is the second
+# threshold of the band modes. Pulse and runt triggers fire on the pulse's
+# trailing edge, once its width or height is known.
+TriggerSpec = collections.namedtuple(
+    'TriggerSpec',
+    ['mode', 'level', 'hysteresis', 'level2', 'min_width', 'max_width', 'polarity'],
+    defaults=('off', 0.0, 0.0, 0.0, 0, np.inf, 'positive'),
+)
+
+
+def defaultWindow(y_data, display_size, h_offset=0):
+    """Untriggered display window: centred in the frame, shifted by h_offset samples."""
+    n = len(y_data)
+    start = max(0, min(n - display_size, n // 2 - display_size // 2 + h_offset))
+    return y_data[start:start + display_size]
+
+
+def _masks(y, mode, level, hysteresis):
+    """(armed, fired) masks: where the signal re-arms the trigger and where it fires."""
+    if mode == 'rising':
+        return y < level - hysteresis, y >= level
+    if mode == 'falling':
+        return y > level + hysteresis, y < level
+    raise ValueError(f"Unknown trigger mode: {mode}")
+
+
+def _crossingAt(y, e, level):
+    """Fractional position where y crosses level between samples e - 1 and e."""
+    y0, y1 = y[e - 1], y[e]
+    return e - 1 + (level - y0) / (y1 - y0)
+
+
+def _edgeTrigger(region, mode, level, hysteresis):
+    """(firing sample, fractional crossing) of the first edge trigger in region, or None."""
+    armed, fired = _masks(region, mode, level, hysteresis)
+    arm = int(np.argmax(armed))
+    if not armed[arm]:
+        return None
+    # Nothing between the arming sample and the next firing one is a firing sample,
+    # so the sample before it is always on the armed side of level
+    fire = arm + int(np.argmax(fired[arm:]))
+    if not fired[fire]:
+        return None
+    return fire, _crossingAt(region, fire, level)
+
+
+def findTrigger(region, mode, level=0.0, hysteresis=0.0):
+    """Fractional index of the first trigger crossing in region, or None.
+
+    Rising: the signal must first drop below level - hysteresis to arm, then
+    the first sample at or above level fires. Falling mirrors this around
+    level + hysteresis. Noise smaller than the hysteresis band can neither
+    re-arm nor fire the trigger. The crossing between the firing sample and
+    the one before it is linearly interpolated; with hysteresis 0 this is the
+    same sample pair a plain sign-change search finds first.
+    """
+    found = _edgeTrigger(region, mode, level, hysteresis)
+    return None if found is None else found[1]
+
+
+def _edgeTriggers(frames, mode, level, hysteresis):
+    """Batched _edgeTrigger over the rows of a 2-D array of frames.
+
+    Returns (firing sample, fractional crossing) arrays, -1 and NaN where a
+    row has no trigger; as for one frame, a window aligned on the sample
+    before the crossing starts at firing sample - 1.
+    """
+    frames = np.asarray(frames)
+    rows = np.arange(len(frames))
+    armed, fired = _masks(frames, mode, level, hysteresis)
+    arm = np.argmax(armed, axis=1)
+    fired &= np.arange(frames.shape[1]) > arm[:, None]
+    fire = np.argmax(fired, axis=1)
+    ok = armed[rows, arm] & fired[rows, fire]
+    y0 = frames[rows, np.maximum(fire - 1, 0)]
+    y1 = frames[rows, fire]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        t = fire - 1 + (level - y0) / (y1 - y0)
+    return np.where(ok, fire, -1), np.where(ok, t, np.nan)
+
+
+def findTriggers(frames, mode, level=0.0, hysteresis=0.0):
+    """Vectorized findTrigger over a 2-D batch of frames; NaN where a row has no trigger."""
+    return _edgeTriggers(frames, mode, level, hysteresis)[1]
+
+
+# ── Pulse, glitch, runt and window triggers ─────────────────────────────
+
+def _edges(state):
+    """Index of the first sample after every False->True and True->False transition."""
+    d = np.diff(state.view(np.int8))
+    return np.flatnonzero(d == 1) + 1, np.flatnonzero(d == -1) + 1
+
+
+def _pulses(state):
+    """(starts, ends) of every complete run of True in a boolean array."""
+    starts, ends = _edges(state)
+    if len(starts) == 0 or len(ends) == 0:
+        return starts[:0], ends[:0]
+    ends = ends[np.searchsorted(ends, starts[0]):]
+    return starts[:len(ends)], ends
+
+
+def _pulseCandidates(y, spec):
+    """Sorted trailing-edge indices of the pulses qualifying under spec."""
+    if spec.mode == 'glitch':
+        # Either polarity, narrower than max_width
+        high = y >= spec.level
+        ends = []
+        for state in (high, ~high):
+            starts, stops = _pulses(state)
+            ends.append(stops[stops - starts < spec.max_width])
+        return np.sort(np.concatenate(ends))
+
+    state = y >= spec.level if spec.polarity == 'positive' else y < spec.level
+    starts, ends = _pulses(state)
+    widths = ends - starts
+    if spec.mode == 'pulse_lt':
+        keep = widths < spec.max_width
+    elif spec.mode == 'pulse_gt':
+        keep = widths > spec.min_width
+    else:
+        keep = (widths >= spec.min_width) & (widths <= spec.max_width)
+    return ends[keep]
+
+
+def _runtCandidates(y, spec):
+    """Trailing edges of pulses that cross one threshold but turn back before the other."""
+    low, high = sorted((spec.level, spec.level2))
+    if spec.polarity == 'positive':
+        state, reached = y >= low, y >= high
+    else:
+        state, reached = y < high, y < low
+    starts, ends = _pulses(state)
+    reached_count = np.concatenate(([0], np.cumsum(reached)))
+    return ends[reached_count[ends] == reached_count[starts]]
+
+
+def _eventTrigger(y, spec, search_start, search_end):
+    """(sample after the crossing, fractional crossing) of the first event, or None."""
+    if spec.mode in PULSE_MODES:
+        candidates = _pulseCandidates(y, spec)
+    elif spec.mode == 'runt':
+        candidates = _runtCandidates(y, spec)
+    elif spec.mode in ('window_enter', 'window_exit'):
+        low, high = sorted((spec.level, spec.level2))
+        enters, exits = _edges((y >= low) & (y <= high))
+        candidates = enters if spec.mode == 'window_enter' else exits
+    else:
+        raise ValueError(f"Unknown trigger mode: {spec.mode}")
+
+    # Both samples around the crossing must be inside the search region
+    i = np.searchsorted(candidates, search_start + 1)
+    if i == len(candidates) or candidates[i] > search_end - 1:
+        return None
+    e = int(candidates[i])
+
+    if spec.mode in PULSE_MODES:
+        return e, _crossingAt(y, e, spec.level)
+    low, high = sorted((spec.level, spec.level2))
+    if spec.mode == 'runt':
+        return e, _crossingAt(y, e, low if spec.polarity == 'positive' else high)
+    # Window: interpolate on whichever bound the signal crossed
+    outside = y[e - 1] if spec.mode == 'window_enter' else y[e]
+    return e, _crossingAt(y, e, high if outside > high else low)
+
+
+def findEventTrigger(y, spec, search_start, search_end):
+    """Fractional trigger position of the first pulse/glitch/runt/window event, or None.
+
+    Events are found with edge-pair analysis over the whole frame, so a pulse
+    that starts before the search region is still measured correctly; only
+    the trigger position itself must lie in [search_start, search_end - 1].
+    """
+    found = _eventTrigger(y, spec, search_start, search_end)
+    return None if found is None else found[1]
+
+
+def resampleWindow(y_data, start, display_size, out=None):
+    """display_size samples of y_data from fractional index start, linearly interpolated."""
+    base = int(np.floor(start))
+    frac = start - base
+    a = y_data[base:base + display_size]
+    if frac == 0:
+        if out is None:
+            return a.copy()
+        out[:] = a
+        return out
+    b = y_data[base + 1:base + display_size + 1]
+    out = np.subtract(b, a, out=out)
+    out *= frac
+    out += a
+    return out
+
+
+def applyTrigger(y_data, display_size, trigger, h_offset=0, interpolate=True):
+    """Extract display_size points from a frame, aligned on the first trigger event.
+
+    trigger is a TriggerSpec, or just a mode name for an edge trigger at 0 V.
+    The trigger position lands display_size // 2 + h_offset samples into the
+    window; without an event the default window is returned. With
+    interpolate the window is resampled at the fractional crossing, so the
+    trigger point sits at exactly the same x-position (and at exactly the
+    level) in every frame instead of jittering by a sample.
+    """
+    if isinstance(trigger, str):
+        trigger = TriggerSpec(trigger)
+    n = len(y_data)
+    ds = display_size
+    base = ds // 2
+
+    if trigger.mode not in EDGE_MODES + PULSE_MODES + BAND_MODES:
+        return defaultWindow(y_data, ds, h_offset)
+
+    pre = max(0, min(ds, base + h_offset))
+    post = ds - pre
+    search_start = pre
+    search_end = n - post
+
+    if search_start >= search_end:
+        return defaultWindow(y_data, ds, h_offset)
+
+    if trigger.mode in EDGE_MODES:
+        found = _edgeTrigger(y_data[search_start:search_end], trigger.mode,
+                             trigger.level, trigger.hysteresis)
+        if found is not None:
+            found = (found[0] + search_start, found[1] + search_start)
+    else:
+        found = _eventTrigger(y_data, trigger, search_start, search_end)
+    if found is None:
+        return defaultWindow(y_data, ds, h_offset)
+    e, t = found
+
+    if not interpolate:
+        # The last sample before the crossing; int(t) would be one late when
+        # the sample after it lies exactly on the level
+        idx = e - 1
+        return y_data[idx - pre:idx + post]
+    # search_start < t <= search_end - 1, so the window plus the extra sample
+    # needed for interpolation always fits in the frame
+    return resampleWindow(y_data, t - pre, ds)
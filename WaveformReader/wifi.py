@@ -0,0 +1,81 @@
+import os
+import subprocess
+import time
+
+
+def joinAccessPoint(ssid, password):
+    """Join the probe's WiFi access point via netsh. Returns (success, message)."""
+    try:
+        subprocess.run(
+            ["netsh", "wlan", "disconnect"],
+            capture_output=True, text=True, timeout=10
+        )
+        time.sleep(1)
+
+        ensureWifiProfile(ssid, password)
+
+        result = subprocess.run(
+            ["netsh", "wlan", "connect", f"name={ssid}", f"ssid={ssid}"],
+            capture_output=True, text=True, timeout=15
+        )
+        print(f"netsh connect stdout: {result.stdout.strip()}")
+        print(f"netsh connect stderr: {result.stderr.strip()}")
+
+        if "successfully" in result.stdout.lower():
+            time.sleep(2)
+            return True, "WiFi connected"
+        return False, "WiFi failed — is device on?"
+    except subprocess.TimeoutExpired:
+        return False, "WiFi timed out"
+    except Exception as e:
+        return False, str(e)
+
+
+def ensureWifiProfile(ssid, password):
+    check = subprocess.run(
+        ["netsh", "wlan", "show", "profile", ssid],
+        capture_output=True, text=True, timeout=10
+    )
+    if ssid in check.stdout:
+        return
+
+    profile_xml = f"""<?xml version="1.0"?>
+<WLANProfile xmlns="http://www.microsoft.com/networking/WLAN/profile/v1">
+    <name>{ssid}</name>
+    <SSIDConfig><SSID><name>{ssid}</name></SSID></SSIDConfig>
+    <connectionType>ESS</connectionType>
+    <connectionMode>manual</connectionMode>
+    <MSM><security>
+        <authEncryption><authentication>WPA2PSK</authentication>
+            <encryption>AES</encryption><useOneX>false</useOneX></authEncryption>
+        <sharedKey><keyType>passPhrase</keyType>
+            <protected>false</protected><keyMaterial>{password}</keyMaterial></sharedKey>
+    </security></MSM>
+</WLANProfile>"""
+    tmp = os.path.join(os.environ.get("TEMP", "."), "esp_ap_profile.xml")
+    with open(tmp, "w") as f:
+        f.write(profile_xml)
+
+    result = subprocess.run(
+        ["netsh", "wlan", "add", "profile", f"filename={tmp}"],
+        capture_output=True, text=True, timeout=10
+    )
+    out = result.stdout.strip()
+    print(f"netsh add profile: {out}")
+
+    if "denied" in out.lower() or "used" not in out.lower():
+        print("Profile add may need admin — retrying elevated")
+        try:
+            import ctypes
+            ctypes.windll.shell32.ShellExecuteW(
+                None, "runas", "netsh",
+                f'wlan add profile filename="{tmp}"', None, 0
+            )
+            time.sleep(3)
+        except Exception as e:
+            print(f"Elevated profile add failed: {e}")
+
+    try:
+        os.remove(tmp)
+    except OSError:
+        pass